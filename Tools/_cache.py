@@ -0,0 +1,63 @@
+"""
+Disk memoization for slow, billed API calls (Firecrawl scrapes, Place details).
+
+Re-running the pipeline on the same rows — during development or after an
+ERROR — would otherwise pay for the same scrape again. Results are stored as
+one JSON file per call under .tmp/cache/<namespace>/, keyed by a hash of the
+arguments, and reused until they are older than the TTL.
+
+Exceptions and empty results are never cached, so a failed call is retried
+on the next run instead of being replayed for a day.
+"""
+
+import os
+import sys
+import time
+import hashlib
+import functools
+import threading
+import orjson
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", ".tmp", "cache")
+
+
+def memoize_to_disk(namespace: str, ttl_hours: float = 24, cache_dir: str = CACHE_DIR):
+    """Cache a function's JSON-serializable result on disk for `ttl_hours`."""
+    ttl = ttl_hours * 3600
+    directory = os.path.join(cache_dir, namespace)
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = orjson.dumps([fn.__qualname__, args, kwargs], option=orjson.OPT_SORT_KEYS)
+            path = os.path.join(directory, hashlib.sha256(key).hexdigest() + ".json")
+
+            try:
+                with open(path, "rb") as f:
+                    entry = orjson.loads(f.read())
+                if time.time() - entry.get("ts", 0) < ttl:
+                    print(f"[{namespace}] Cache hit", file=sys.stderr)
+                    return entry["val"]
+            except (OSError, orjson.JSONDecodeError, KeyError):
+                pass
+
+            result = fn(*args, **kwargs)
+            if result:
+                _write(path, {"ts": time.time(), "val": result}, namespace)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def _write(path: str, entry: dict, namespace: str) -> None:
+    """Write atomically (temp file + os.replace) so a crash never leaves a torn entry."""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(entry))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"[{namespace}] Could not write cache: {e}", file=sys.stderr)
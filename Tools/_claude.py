@@ -0,0 +1,54 @@
+"""
+Shared Anthropic client and retry policy for the tools that call Claude.
+
+The SDK's built-in retries are switched off (max_retries=0): the tenacity
+policy below is the only retry layer, so a call makes at most MAX_ATTEMPTS
+requests instead of MAX_ATTEMPTS × 3.
+"""
+
+import os
+import sys
+import anthropic
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+MAX_ATTEMPTS = 5
+
+_client = None
+
+
+def get_client() -> anthropic.Anthropic:
+    """Return the shared Anthropic client, created on first use so its HTTPS pool is reused."""
+    global _client
+    if _client is None:
+        _client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"), max_retries=0)
+    return _client
+
+
+def _retryable(exc: BaseException) -> bool:
+    """Overloaded, rate-limited, 5xx and transport errors are retried; other 4xx are not."""
+    if isinstance(exc, anthropic.APIStatusError):
+        return exc.status_code in (429, 529) or exc.status_code >= 500
+    return isinstance(exc, anthropic.APIConnectionError)  # includes APITimeoutError
+
+
+def retry_claude(tool_name: str):
+    """
+    Retry decorator for one Claude request, logging as [tool_name].
+    Randomized exponential backoff: concurrent workers hitting the same 529
+    spread out instead of retrying in lockstep.
+    """
+    def log_retry(retry_state) -> None:
+        exc = retry_state.outcome.exception()
+        print(
+            f"[{tool_name}] {type(exc).__name__}: {exc} — retrying in {retry_state.next_action.sleep:.0f}s "
+            f"(attempt {retry_state.attempt_number}/{MAX_ATTEMPTS})",
+            file=sys.stderr,
+        )
+
+    return retry(
+        retry=retry_if_exception(_retryable),
+        wait=wait_random_exponential(multiplier=2, max=90),
+        stop=stop_after_attempt(MAX_ATTEMPTS),
+        before_sleep=log_retry,
+        reraise=True,
+    )
@@ -0,0 +1,18 @@
+"""
+.env loading shared by the tools.
+
+Each tool reads .env on import so it also works as a standalone CLI, but the
+pipeline imports all of them: the _DOTENV_LOADED flag makes that a single
+parse per process. The flag lives in os.environ, so subprocesses skip it too.
+"""
+
+import os
+
+
+def load() -> None:
+    """Parse .env into os.environ, once per process."""
+    if os.getenv("_DOTENV_LOADED") == "1":
+        return
+    from dotenv import load_dotenv
+    load_dotenv()
+    os.environ["_DOTENV_LOADED"] = "1"
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Draft cold emails for many businesses in one Anthropic Message Batch.
+
+Same prompt and model as draft_email.py, but submitted as a single batch:
+50% cheaper per token and no per-email stream/retry overhead. Results come
+back asynchronously (usually minutes, at most 24h) — fine for outreach runs
+where emails get queued anyway.
+
+Usage:
+    python Tools/batch_draft_emails.py --input emails.jsonl [--out .tmp/email_drafts.jsonl]
+
+Input:  one JSON object per line:
+        {"data": {"Business Name": "...", ...}, "live_url": "https://...",
+         "scraped_text": "...", "reviews_text": "..."}   (texts optional)
+Output: one JSON object per business with the email draft (or the error),
+        written to --out in input order. Path printed to stdout.
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(__file__))
+import _env
+
+_env.load()
+import anthropic
+
+import draft_email
+
+TMP_DIR = os.path.join(os.path.dirname(__file__), "..", ".tmp")
+POLL_INTERVAL = 30        # seconds between batch status checks
+POLL_TIMEOUT = 24 * 3600  # batches expire after 24h
+
+
+def submit(client: anthropic.Anthropic, items: list[dict]) -> str:
+    """Create the batch and return its ID. custom_id is the input line index."""
+    batch = client.messages.batches.create(
+        requests=[
+            {
+                "custom_id": f"biz-{i}",
+                "params": draft_email.build_params(
+                    item["data"],
+                    item["live_url"],
+                    item.get("scraped_text", ""),
+                    item.get("reviews_text", ""),
+                ),
+            }
+            for i, item in enumerate(items)
+        ]
+    )
+    print(f"[batch_draft_emails] Batch created: {batch.id} ({len(items)} request(s))", file=sys.stderr)
+    return batch.id
+
+
+def wait_for(client: anthropic.Anthropic, batch_id: str) -> None:
+    """Poll until the batch has ended."""
+    deadline = time.time() + POLL_TIMEOUT
+    while time.time() < deadline:
+        batch = client.messages.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        print(
+            f"[batch_draft_emails] {batch.processing_status}: "
+            f"{counts.succeeded} ok, {counts.errored} errored, {counts.processing} processing",
+            file=sys.stderr,
+        )
+        if batch.processing_status == "ended":
+            return
+        time.sleep(POLL_INTERVAL)
+    raise TimeoutError(f"Batch {batch_id} did not finish within {POLL_TIMEOUT}s")
+
+
+def collect(client: anthropic.Anthropic, batch_id: str, items: list[dict]) -> list[dict]:
+    """Map batch results back onto the input order."""
+    results = [None] * len(items)
+    for entry in client.messages.batches.results(batch_id):
+        i = int(entry.custom_id.removeprefix("biz-"))
+        business_name = items[i]["data"].get("Business Name", "")
+        if entry.result.type == "succeeded":
+            try:
+                results[i] = {
+                    "business_name": business_name,
+                    "status": "ok",
+                    "email_draft": draft_email.extract_email(entry.result.message),
+                }
+                continue
+            except RuntimeError as e:
+                error = str(e)
+        elif entry.result.type == "errored":
+            error = str(entry.result.error)
+        else:
+            error = entry.result.type  # canceled / expired
+        results[i] = {"business_name": business_name, "status": "error", "error": error[:500]}
+
+    for i, result in enumerate(results):
+        if result is None:
+            results[i] = {
+                "business_name": items[i]["data"].get("Business Name", ""),
+                "status": "error",
+                "error": "missing from batch results",
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Draft cold emails in one Message Batch")
+    parser.add_argument("--input", required=True, help="JSONL file, one business per line")
+    parser.add_argument("--out", default=os.path.join(TMP_DIR, "email_drafts.jsonl"), help="Output JSONL path")
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        items = [json.loads(line) for line in f if line.strip()]
+    if not items:
+        print("[batch_draft_emails] Input is empty, nothing to do", file=sys.stderr)
+        return
+
+    client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    batch_id = submit(client, items)
+    wait_for(client, batch_id)
+    results = collect(client, batch_id, items)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        for result in results:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    ok = sum(1 for r in results if r["status"] == "ok")
+    print(f"[batch_draft_emails] {ok}/{len(results)} email(s) drafted", file=sys.stderr)
+    print(args.out)  # stdout: path to the results file
+
+
+if __name__ == "__main__":
+    main()
@@ -16,13 +16,50 @@ Output: HTML written to --out file (default: .tmp/website.html) and path printed
 import sys
 import os
 import re
-import json
 import time
+import hashlib
 import argparse
-from dotenv import load_dotenv
+import tempfile
+import threading
 
-load_dotenv()
+sys.path.insert(0, os.path.dirname(__file__))
+import _env
+
+_env.load()
 import anthropic
+import httpx
+import orjson
+import _claude
+
+MODEL = "claude-opus-4-6"
+STREAM_IDLE_TIMEOUT = 90  # seconds without any stream data before we give up
+PROGRESS_EVERY_CHARS = 4000  # ~1000 tokens between progress lines
+# A text block that is still not HTML at this length is a runaway, not the
+# short research/commentary text web_search turns may put before the HTML block
+NON_HTML_BLOCK_MAX_CHARS = 20_000
+MAX_OUTPUT_CHARS = 200_000   # hard cap on streamed text before aborting
+SIMPLE_INPUT_THRESHOLD = 2000  # complexity score below which thinking is skipped
+
+TMP_DIR = os.path.join(os.path.dirname(__file__), "..", ".tmp")
+_SAFE_RE = re.compile(r"[^\w-]")  # filename-safe: word chars and dashes only
+
+# Identical inputs → identical site; re-runs skip the Opus call entirely
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", ".tmp", "website_cache")
+
+_FENCE_HEAD = re.compile(r"^```html?\s*\n?", re.IGNORECASE)
+_FENCE_TAIL = re.compile(r"\n?```\s*$")
+_HTML_PREFIXES = ("<!doctype", "<html", "```html", "<")
+# Whole-line nav/legal chrome only — "Bekijk onze menukaart" or "Thuiskapper /
+# home service" are content, a bare "Menu" or "Home" link is not
+_BOILERPLATE_RE = re.compile(
+    r"^\W*(?:menu|home|inloggen|login|zoeken|search|skip to (?:main )?content"
+    r"|cookies?(?: ?(?:settings|instellingen|beleid|policy))?"
+    r"|privacy(?: ?(?:policy|verklaring|beleid|statement))?|algemene voorwaarden"
+    r"|(?:©|copyright\b).*)\W*$",
+    re.IGNORECASE,
+)
+_DIGIT_RE = re.compile(r"\d")
+SCRAPED_BUDGET = 6000  # chars of scraped content sent to Claude
 
 SYSTEM_PROMPT = """You are an expert web designer building premium preview websites for Dutch local businesses (loodgieters, elektriciens, autowerkplaatsen, kappers, fysiotherapeuten, etc).
 
@@ -63,69 +100,217 @@ SECTIONS (include only if you have the data):
 
 OUTPUT: raw HTML only. No markdown. No explanation. Start with <!DOCTYPE html>."""
 
+USER_INSTRUCTIONS = """Build a premium Dutch preview website for the local business described below.
+
+INSTRUCTIONS:
+1. First use web_search to research the business (research query given below) — look for any additional context about the business, but do NOT invent testimonials, statistics, or review quotes from search results.
+2. Then generate the complete single-file HTML website following all rules in your system prompt.
+3. Before outputting, verify every fact on the page traces back to the BUSINESS DATA or SCRAPED CONTENT below. Remove anything you can't trace."""
+
+
+def _compress_scraped(text: str, budget: int = SCRAPED_BUDGET) -> str:
+    """
+    Keep the high-signal lines of scraped markdown within budget.
+    Text that already fits is passed through untouched. Otherwise drops short
+    fragments, nav/cookie/footer boilerplate and lines repeated across pages,
+    so the budget goes to actual content instead of the same menu five times.
+    Headings, page markers and short lines with digits (phone numbers,
+    opening hours, prices) are kept regardless of length.
+    """
+    if len(text) <= budget:
+        return text
+    kept = {}
+    used = 0
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line in kept:
+            continue
+        structural = line.startswith("#") or line.startswith("--- PAGE:")
+        if not structural and (
+            (len(line) < 20 and not _DIGIT_RE.search(line)) or _BOILERPLATE_RE.match(line)
+        ):
+            continue
+        room = budget - used - 1
+        if len(line) > room:
+            # Out of budget: keep what fits of this line (a scrape can be one
+            # long paragraph) rather than dropping it whole
+            if room >= 20:
+                kept[line[:room]] = None
+            break
+        kept[line] = None
+        used += len(line) + 1
+    return "\n".join(kept)
+
+
+def _cache_key(business_data: dict, scraped_text: str, reviews_text: str) -> str:
+    """Hash every input that shapes the output — prompt or model edits bust the cache."""
+    h = hashlib.sha256()
+    for part in (
+        MODEL,
+        SYSTEM_PROMPT,
+        USER_INSTRUCTIONS,
+        orjson.dumps(business_data, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS).decode(),
+        scraped_text,
+        reviews_text,
+    ):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _looks_like_html(html: str) -> bool:
+    return html.lower().startswith(("<!doctype", "<html"))
+
+
+def _write_cache(path: str, html: str) -> None:
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # pid + thread id: pipeline rows and run_batch workers are threads of one process
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(html)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"[build_website] Could not write cache: {e}", file=sys.stderr)
+
+
+def save_html(business_name: str, html: str) -> str:
+    """
+    Write generated HTML to a new file in .tmp (deployed from there, kept for
+    inspection) and return its path. Every call gets its own file: builds run
+    concurrently, and two businesses can share a (truncated) name — a shared
+    path would deploy one's site for the other.
+    """
+    os.makedirs(TMP_DIR, exist_ok=True)
+    safe_name = _SAFE_RE.sub("_", business_name)[:50]
+    fd, path = tempfile.mkstemp(prefix=f"{safe_name}-", suffix=".html", dir=TMP_DIR)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(html)
+    return path
+
+
+def _thinking_config(business_data: dict, scraped_text: str, reviews_text: str):
+    """
+    Adaptive thinking for rich inputs, none for bare-bones ones.
+    A business with only name + phone + address gains nothing from 5-30s of
+    thinking. Adaptive mode picks its own budget, so there is no upper tier.
+    """
+    filled_fields = sum(1 for v in business_data.values() if str(v).strip())
+    complexity = len(scraped_text) + 500 * bool(reviews_text) + 100 * filled_fields
+    if complexity < SIMPLE_INPUT_THRESHOLD:
+        return anthropic.NOT_GIVEN
+    return {"type": "adaptive"}
+
+
+@_claude.retry_claude("build_website")
+def _stream_response(client: anthropic.Anthropic, messages: list, thinking):
+    """Run one streaming request and return the final message."""
+    print("[build_website] Streaming from Claude...", file=sys.stderr)
+    started = time.monotonic()
+    # System prompt + tool definition are identical for every business, so they
+    # are marked cacheable too — consecutive pipeline rows hit the prompt cache.
+    # Streaming keeps the connection alive and shows real progress.
+    # Without streaming, the request hangs silently for minutes waiting for headers.
+    with client.messages.stream(
+        model=MODEL,
+        max_tokens=30000,
+        thinking=thinking,
+        system=[{"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}],
+        tools=[{"type": "web_search_20250305", "name": "web_search", "cache_control": {"type": "ephemeral"}}],
+        messages=messages,
+        timeout=httpx.Timeout(STREAM_IDLE_TIMEOUT, connect=15.0),
+    ) as stream:
+        # The read timeout above is the dead-man switch — no bytes (text,
+        # thinking or ping) for STREAM_IDLE_TIMEOUT seconds aborts instead of
+        # hanging silently. Text events are also sniffed so a runaway or
+        # non-HTML generation is cut off before it burns the whole max_tokens
+        # (only the last text block is the site; earlier ones may be prose);
+        # raising inside the `with` closes the stream.
+        total_chars = 0
+        last_log = 0
+        sniffed = False
+        for event in stream:
+            if event.type == "content_block_start":
+                sniffed = False  # sniff each text block on its own
+                continue
+            if event.type != "text":
+                continue
+
+            total_chars += len(event.text)
+            if total_chars // PROGRESS_EVERY_CHARS > last_log:
+                last_log = total_chars // PROGRESS_EVERY_CHARS
+                print(
+                    f"[build_website] streaming... ~{total_chars // 4} tokens "
+                    f"({time.monotonic() - started:.0f}s)",
+                    file=sys.stderr,
+                )
+
+            if not sniffed and len(event.snapshot) >= NON_HTML_BLOCK_MAX_CHARS:
+                sniffed = True
+                head = event.snapshot.lstrip().lower()
+                if not head.startswith(_HTML_PREFIXES):
+                    raise RuntimeError(
+                        f"Claude wrote {NON_HTML_BLOCK_MAX_CHARS}+ chars of non-HTML text, aborted stream. "
+                        f"First 200 chars: {event.snapshot[:200]}"
+                    )
+            if total_chars > MAX_OUTPUT_CHARS:
+                raise RuntimeError(f"Claude output exceeded {MAX_OUTPUT_CHARS} chars, aborted stream")
+        response = stream.get_final_message()
+    elapsed = time.monotonic() - started
+    print(f"[build_website] Stream finished in {elapsed:.0f}s (~{total_chars // 4} text tokens)", file=sys.stderr)
+    return response
+
 
 def build_website(business_data: dict, scraped_text: str = "", reviews_text: str = "") -> str:
     """Call Claude API via streaming and return generated HTML string."""
-    client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-
     business_name = business_data.get("Business Name", "dit bedrijf")
     city = business_data.get("City", "")
+    scraped_text = _compress_scraped(scraped_text) if scraped_text else ""
+
+    cache_path = os.path.join(CACHE_DIR, _cache_key(business_data, scraped_text, reviews_text) + ".html")
+    if os.path.exists(cache_path):
+        with open(cache_path, "r", encoding="utf-8") as f:
+            html = f.read()
+        # Same sanity check as fresh output, plus a complete document — a
+        # damaged entry is regenerated (and overwritten) instead of deployed
+        if _looks_like_html(html) and html.rstrip().lower().endswith("</html>"):
+            print(f"[build_website] Cache hit for '{business_name}' ({len(html)} chars)", file=sys.stderr)
+            return html
+        print(f"[build_website] Ignoring damaged cache entry for '{business_name}'", file=sys.stderr)
 
-    user_prompt = f"""Build a premium Dutch preview website for this local business.
+    client = _claude.get_client()
 
-BUSINESS DATA:
-{json.dumps(business_data, ensure_ascii=False, indent=2)}
+    business_block = f"""BUSINESS DATA:
+{orjson.dumps(business_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()}
 
 CURRENT WEBSITE CONTENT (scraped from their existing site):
-{scraped_text[:6000] if scraped_text else "Niet beschikbaar"}
+{scraped_text or "Niet beschikbaar"}
 
 {reviews_text if reviews_text else ""}
 
-INSTRUCTIONS:
-1. First use web_search to research "{business_name} {city}" — look for any additional context about the business, but do NOT invent testimonials, statistics, or review quotes from search results.
-2. Then generate the complete single-file HTML website following all rules in your system prompt.
-3. Before outputting, verify every fact on the page traces back to the BUSINESS DATA or SCRAPED CONTENT above. Remove anything you can't trace.
+Research query for step 1: "{business_name} {city}"
 
 Output the raw HTML only. Nothing else."""
 
-    messages = [{"role": "user", "content": user_prompt}]
-
-    # Streaming keeps the connection alive and shows real progress.
-    # Without streaming, the request hangs silently for minutes waiting for headers.
-    last_error = None
-    for attempt in range(3):
-        try:
-            print(f"[build_website] Streaming from Claude (attempt {attempt+1}/3)...", file=sys.stderr)
-            with client.messages.stream(
-                model="claude-opus-4-6",
-                max_tokens=30000,
-                thinking={"type": "adaptive"},
-                system=SYSTEM_PROMPT,
-                tools=[{"type": "web_search_20250305", "name": "web_search"}],
-                messages=messages,
-            ) as stream:
-                for event in stream:
-                    event_type = getattr(event, "type", "")
-                    if event_type == "content_block_start":
-                        block_type = getattr(getattr(event, "content_block", None), "type", "")
-                        if block_type == "thinking":
-                            print("[build_website] Thinking...", file=sys.stderr)
-                        elif block_type == "tool_use":
-                            print("[build_website] Web searching...", file=sys.stderr)
-                        elif block_type == "text":
-                            print("[build_website] Generating HTML...", file=sys.stderr)
-                response = stream.get_final_message()
-            break
-        except anthropic.APIStatusError as e:
-            if e.status_code == 529 and attempt < 2:
-                wait = 20 * (attempt + 1)
-                print(f"[build_website] Claude overloaded (529), waiting {wait}s...", file=sys.stderr)
-                time.sleep(wait)
-                last_error = e
-                continue
-            raise
-    else:
-        raise last_error
+    # Static instructions go first and carry the cache breakpoint, so the cached
+    # prefix (tools + system + instructions) is shared by every business.
+    # Per-business data goes last — it never invalidates the cached prefix.
+    messages = [{
+        "role": "user",
+        "content": [
+            {"type": "text", "text": USER_INSTRUCTIONS, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": business_block},
+        ],
+    }]
+
+    thinking = _thinking_config(business_data, scraped_text, reviews_text)
+    if thinking is anthropic.NOT_GIVEN:
+        print("[build_website] Sparse input, skipping extended thinking", file=sys.stderr)
+
+    try:
+        response = _stream_response(client, messages, thinking)
+    except anthropic.APITimeoutError as e:
+        raise TimeoutError(f"No data from Claude for {STREAM_IDLE_TIMEOUT}s, aborting stream") from e
 
     # Extract HTML from the last text block
     html = None
@@ -138,14 +323,15 @@ Output the raw HTML only. Nothing else."""
         raise RuntimeError("Claude returned no text content block")
 
     # Strip markdown fences if present
-    html = re.sub(r"^```html?\s*\n?", "", html, flags=re.IGNORECASE)
-    html = re.sub(r"\n?```\s*$", "", html)
+    html = _FENCE_HEAD.sub("", html)
+    html = _FENCE_TAIL.sub("", html)
     html = html.strip()
 
-    if not html.lower().startswith("<!doctype") and not html.lower().startswith("<html"):
+    if not _looks_like_html(html):
         raise RuntimeError(f"Claude output doesn't look like HTML. First 200 chars: {html[:200]}")
 
     print(f"[build_website] Generated {len(html)} chars of HTML for '{business_name}'", file=sys.stderr)
+    _write_cache(cache_path, html)
     return html
 
 
@@ -156,7 +342,7 @@ def main():
     parser.add_argument("--out", default=".tmp/website.html", help="Output file path")
     args = parser.parse_args()
 
-    business_data = json.loads(args.data)
+    business_data = orjson.loads(args.data)
 
     os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
     html = build_website(business_data, args.scraped_text)
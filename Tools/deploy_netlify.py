@@ -16,32 +16,51 @@ import os
 import re
 import time
 import hashlib
+import functools
 import unicodedata
 import argparse
-import requests
-from dotenv import load_dotenv
+import httpx
 
-load_dotenv()
+sys.path.insert(0, os.path.dirname(__file__))
+import _env
+
+_env.load()
 
 NETLIFY_API = "https://api.netlify.com/api/v1"
 
+_SUFFIX_RE = re.compile(r"\b(b\.?v\.?|n\.?v\.?|v\.?o\.?f\.?|bvba|ltd|gmbh)\b", re.IGNORECASE)
+# After ASCII-folding every char is < 128: map everything but [a-z0-9] to "-" in one
+# C-level pass, then collapse the runs of hyphens.
+_SLUG_KEEP = set("abcdefghijklmnopqrstuvwxyz0123456789")
+_SLUG_TABLE = str.maketrans({chr(i): "-" for i in range(128) if chr(i) not in _SLUG_KEEP})
+_DASHES_RE = re.compile(r"-{2,}")
+
+# One HTTP/2 client per process: the three calls of a deploy — and concurrent
+# deploys from run_batch threads — multiplex over a single TCP + TLS connection.
+_HTTP = httpx.Client(
+    http2=True,
+    timeout=30,
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+)
+
 
+@functools.lru_cache(maxsize=4096)
 def slugify(name: str) -> str:
     """Convert business name to a URL-safe slug."""
     # Strip legal suffixes
-    name = re.sub(r"\b(b\.?v\.?|n\.?v\.?|v\.?o\.?f\.?|bvba|ltd|gmbh)\b", "", name, flags=re.IGNORECASE)
+    name = _SUFFIX_RE.sub("", name)
     # Normalize Dutch/accented characters to ASCII
     name = unicodedata.normalize("NFD", name)
     name = name.encode("ascii", "ignore").decode("ascii")
     # Lowercase, replace anything non-alphanumeric with hyphens
-    name = re.sub(r"[^a-z0-9]+", "-", name.lower())
+    name = _DASHES_RE.sub("-", name.lower().translate(_SLUG_TABLE))
     name = name.strip("-")
     return name[:40]
 
 
-def deploy(html: str, business_name: str) -> str:
+def deploy(html_path: str, business_name: str) -> str:
     """
-    Deploy HTML string to Netlify.
+    Deploy an HTML file to Netlify, streaming it from disk.
     Returns the live HTTPS URL.
     """
     token = os.getenv("NETLIFY_TOKEN")
@@ -49,14 +68,16 @@ def deploy(html: str, business_name: str) -> str:
         raise RuntimeError("NETLIFY_TOKEN not set in .env")
 
     auth_headers = {"Authorization": f"Bearer {token}"}
-    html_bytes = html.encode("utf-8")
-    sha1 = hashlib.sha1(html_bytes).hexdigest()
+    # SHA1 of the raw bytes on disk. file_digest hashes straight from the file
+    # object in C (OpenSSL, GIL released) — never holds the whole file in memory.
+    with open(html_path, "rb") as f:
+        sha1 = hashlib.file_digest(f, "sha1").hexdigest()
     timestamp = int(time.time())
     slug = slugify(business_name)
     site_name = f"{slug}-{timestamp}"
 
     # Step 1: Create site
-    r = requests.post(
+    r = _HTTP.post(
         f"{NETLIFY_API}/sites",
         headers={**auth_headers, "Content-Type": "application/json"},
         json={"name": site_name},
@@ -69,7 +90,7 @@ def deploy(html: str, business_name: str) -> str:
     print(f"[deploy_netlify] Created site: {site_url}", file=sys.stderr)
 
     # Step 2: Create deploy with file digest manifest
-    r = requests.post(
+    r = _HTTP.post(
         f"{NETLIFY_API}/sites/{site_id}/deploys",
         headers={**auth_headers, "Content-Type": "application/json"},
         json={"files": {"/index.html": sha1}},
@@ -79,13 +100,18 @@ def deploy(html: str, business_name: str) -> str:
     deploy_id = r.json()["id"]
     print(f"[deploy_netlify] Deploy created: {deploy_id}", file=sys.stderr)
 
-    # Step 3: Upload the actual HTML file
-    r = requests.put(
-        f"{NETLIFY_API}/deploys/{deploy_id}/files/index.html",
-        headers={**auth_headers, "Content-Type": "application/octet-stream"},
-        data=html_bytes,
-        timeout=60,
-    )
+    # Step 3: Upload the actual HTML file (file object → httpx streams the body)
+    with open(html_path, "rb") as f:
+        r = _HTTP.put(
+            f"{NETLIFY_API}/deploys/{deploy_id}/files/index.html",
+            headers={
+                **auth_headers,
+                "Content-Type": "application/octet-stream",
+                "Content-Length": str(os.path.getsize(html_path)),
+            },
+            content=iter(lambda: f.read(65536), b""),
+            timeout=60,
+        )
     r.raise_for_status()
     print(f"[deploy_netlify] File uploaded. Live at: {site_url}", file=sys.stderr)
 
@@ -98,10 +124,7 @@ def main():
     parser.add_argument("--name", required=True, help="Business name (used for URL slug)")
     args = parser.parse_args()
 
-    with open(args.html, "r", encoding="utf-8") as f:
-        html = f.read()
-
-    url = deploy(html, args.name)
+    url = deploy(args.html, args.name)
     print(url)  # stdout: the live URL
 
 
@@ -3,9 +3,9 @@
 Draft a cold outreach email for a Dutch local business using Claude API.
 
 Uses:
-- claude-opus-4-6 (best quality for natural Dutch)
-- Streaming (required for Opus)
-- No web_search (all data already available from pipeline)
+- claude-haiku-4-5 (a 6-8 line email doesn't need Opus — far cheaper and faster)
+- Streaming
+- No thinking, no web_search (all data already available from pipeline)
 
 Usage:
     python Tools/draft_email.py --data '{"Business Name":"..."}' --live-url 'https://...'
@@ -15,13 +15,22 @@ Output: Email body printed to stdout.
 
 import sys
 import os
-import json
 import time
 import argparse
-from dotenv import load_dotenv
 
-load_dotenv()
+sys.path.insert(0, os.path.dirname(__file__))
+import _env
+
+_env.load()
 import anthropic
+import httpx
+import orjson
+import _claude
+
+MODEL = "claude-haiku-4-5"
+MAX_TOKENS = 2000
+STREAM_IDLE_TIMEOUT = 90  # seconds without any stream data before we give up
+PROGRESS_EVERY_CHARS = 4000  # ~1000 tokens between progress lines
 
 SYSTEM_PROMPT = """Je bent Dan, een jonge AI-specialist die net zijn eigen bureau AiBoostly is gestart.
 Je schrijft korte, eerlijke cold emails aan lokale Nederlandse ondernemers.
@@ -63,10 +72,37 @@ De preview-site IS je pitch. Je hoeft niet te verkopen.
 Laat het werk spreken. De email is alleen de uitnodiging om te kijken."""
 
 
-def draft_email(business_data: dict, live_url: str, scraped_text: str = "", reviews_text: str = "") -> str:
-    """Call Claude API via streaming and return the email body string."""
-    client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-
+@_claude.retry_claude("draft_email")
+def _stream_response(client: anthropic.Anthropic, params: dict):
+    """Run one streaming request and return the final message."""
+    print("[draft_email] Streaming from Claude...", file=sys.stderr)
+    started = time.monotonic()
+    with client.messages.stream(
+        **params,
+        timeout=httpx.Timeout(STREAM_IDLE_TIMEOUT, connect=15.0),
+    ) as stream:
+        # Drive the stream via text_stream; the read timeout above is the
+        # dead-man switch — no bytes (text, thinking or ping) for
+        # STREAM_IDLE_TIMEOUT seconds aborts instead of hanging silently.
+        total_chars = 0
+        last_log = 0
+        for text in stream.text_stream:
+            total_chars += len(text)
+            if total_chars // PROGRESS_EVERY_CHARS > last_log:
+                last_log = total_chars // PROGRESS_EVERY_CHARS
+                print(
+                    f"[draft_email] streaming... ~{total_chars // 4} tokens "
+                    f"({time.monotonic() - started:.0f}s)",
+                    file=sys.stderr,
+                )
+        response = stream.get_final_message()
+    elapsed = time.monotonic() - started
+    print(f"[draft_email] Stream finished in {elapsed:.0f}s (~{total_chars // 4} text tokens)", file=sys.stderr)
+    return response
+
+
+def build_params(business_data: dict, live_url: str, scraped_text: str = "", reviews_text: str = "") -> dict:
+    """Return the Messages API params for one email. Shared with batch_draft_emails.py."""
     business_name = business_data.get("Business Name", "dit bedrijf")
     contact_name = business_data.get("Contact Name", "")
     city = business_data.get("City", "")
@@ -98,51 +134,34 @@ GOOGLE REVIEWS:
 
 Schrijf NUR de email. Geen uitleg, geen opties, geen markdown."""
 
-    messages = [{"role": "user", "content": user_prompt}]
-
-    last_error = None
-    for attempt in range(3):
-        try:
-            print(f"[draft_email] Streaming from Claude (attempt {attempt+1}/3)...", file=sys.stderr)
-            with client.messages.stream(
-                model="claude-opus-4-6",
-                max_tokens=2000,
-                thinking={"type": "adaptive"},
-                system=SYSTEM_PROMPT,
-                messages=messages,
-            ) as stream:
-                for event in stream:
-                    event_type = getattr(event, "type", "")
-                    if event_type == "content_block_start":
-                        block_type = getattr(getattr(event, "content_block", None), "type", "")
-                        if block_type == "thinking":
-                            print("[draft_email] Thinking...", file=sys.stderr)
-                        elif block_type == "text":
-                            print("[draft_email] Drafting email...", file=sys.stderr)
-                response = stream.get_final_message()
-            break
-        except anthropic.APIStatusError as e:
-            if e.status_code == 529 and attempt < 2:
-                wait = 20 * (attempt + 1)
-                print(f"[draft_email] Claude overloaded (529), waiting {wait}s...", file=sys.stderr)
-                time.sleep(wait)
-                last_error = e
-                continue
-            raise
-    else:
-        raise last_error
-
-    # Extract email from the last text block
-    email_text = None
-    for block in reversed(response.content):
-        if getattr(block, "type", None) == "text":
-            email_text = block.text
-            break
-
-    if not email_text:
-        raise RuntimeError("Claude returned no text content block")
-
-    email_text = email_text.strip()
+    return {
+        "model": MODEL,
+        "max_tokens": MAX_TOKENS,
+        "system": [{"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}],
+        "messages": [{"role": "user", "content": user_prompt}],
+    }
+
+
+def extract_email(message) -> str:
+    """Return the email body from the last text block of a Claude message."""
+    for block in reversed(message.content):
+        if getattr(block, "type", None) == "text" and block.text:
+            return block.text.strip()
+    raise RuntimeError("Claude returned no text content block")
+
+
+def draft_email(business_data: dict, live_url: str, scraped_text: str = "", reviews_text: str = "") -> str:
+    """Call Claude API via streaming and return the email body string."""
+    client = _claude.get_client()
+    business_name = business_data.get("Business Name", "dit bedrijf")
+    params = build_params(business_data, live_url, scraped_text, reviews_text)
+
+    try:
+        response = _stream_response(client, params)
+    except anthropic.APITimeoutError as e:
+        raise TimeoutError(f"No data from Claude for {STREAM_IDLE_TIMEOUT}s, aborting stream") from e
+
+    email_text = extract_email(response)
     print(f"[draft_email] Generated {len(email_text)} chars for '{business_name}'", file=sys.stderr)
     return email_text
 
@@ -155,7 +174,7 @@ def main():
     parser.add_argument("--reviews-text", default="", help="Formatted reviews text")
     args = parser.parse_args()
 
-    business_data = json.loads(args.data)
+    business_data = orjson.loads(args.data)
     email = draft_email(business_data, args.live_url, args.scraped_text, args.reviews_text)
     print(email)
 
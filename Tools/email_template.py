@@ -16,6 +16,11 @@ Email HTML rules followed:
 
 import re
 
+# Comments and the whitespace between tags are only there for readability in
+# this file; stripping them cuts about a fifth off the HTML part of every send.
+_COMMENT_RE = re.compile(r"<!--.*?-->", re.S)
+_BETWEEN_TAGS_RE = re.compile(r">\s+<")
+
 
 def extract_preview_url(email_body: str) -> str | None:
     """Find the Netlify preview URL in the email body."""
@@ -87,7 +92,7 @@ def build_html_email(email_body: str, business_name: str = "") -> str:
     body_html = "\n".join(html_paragraphs)
 
     # Build the full HTML email
-    return f'''<!DOCTYPE html>
+    html = f'''<!DOCTYPE html>
 <html lang="nl" xmlns="http://www.w3.org/1999/xhtml">
 <head>
   <meta charset="utf-8">
@@ -173,3 +178,4 @@ def build_html_email(email_body: str, business_name: str = "") -> str:
 
 </body>
 </html>'''
+    return _BETWEEN_TAGS_RE.sub("><", _COMMENT_RE.sub("", html)).strip()
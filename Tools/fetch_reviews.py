@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
 """
-Fetch real Google reviews and photos for a business using the Places API.
+Fetch real Google reviews and photos for a business using the Places API (New).
 
-Single API call returns both reviews and photo references.
+Single API call returns both reviews and photo resource names; the
+X-Goog-FieldMask header limits the response (and billing) to just those fields.
 Photo URLs are constructed as direct Google image links.
 
 Usage:
@@ -12,17 +13,33 @@ Output: JSON with 'reviews' and 'photos' keys.
 """
 
 import sys
-import json
 import argparse
 import os
+import orjson
 import requests
-from dotenv import load_dotenv
-
-load_dotenv()
-
-PLACES_API = "https://maps.googleapis.com/maps/api/place/details/json"
-PHOTO_BASE = "https://maps.googleapis.com/maps/api/place/photo"
-
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+sys.path.insert(0, os.path.dirname(__file__))
+import _env
+from _cache import memoize_to_disk
+
+_env.load()
+
+PLACES_API = "https://places.googleapis.com/v1/places"
+PHOTO_BASE = "https://places.googleapis.com/v1"
+FIELD_MASK = "reviews,photos"
+
+# One pooled session per process: repeated calls reuse the keep-alive HTTPS
+# connection instead of paying a fresh TCP + TLS handshake every time.
+# Transient Google errors (429/5xx, dropped connections) are retried with backoff.
+_HTTP = requests.Session()
+_HTTP.headers["Accept-Encoding"] = "gzip, deflate"
+_HTTP.mount("https://", HTTPAdapter(
+    pool_connections=20,
+    pool_maxsize=20,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]),
+))
 
 def fetch(place_id: str, max_reviews: int = 5, max_photos: int = 6) -> dict:
     """
@@ -38,66 +55,60 @@ def fetch(place_id: str, max_reviews: int = 5, max_photos: int = 6) -> dict:
         print("[fetch_reviews] GOOGLE_MAPS_API_KEY not set, skipping", file=sys.stderr)
         return {"reviews": [], "photos": []}
 
+    place_id = place_id.strip()
     try:
-        r = requests.get(
-            PLACES_API,
-            params={
-                "place_id": place_id.strip(),
-                "fields": "reviews,photos",
-                "language": "nl",
-                "reviews_sort": "most_relevant",
-                "key": api_key,
-            },
-            timeout=15,
-        )
-        r.raise_for_status()
-        data = r.json()
-
-        if data.get("status") != "OK":
-            print(f"[fetch_reviews] API status: {data.get('status')} — {data.get('error_message', '')}", file=sys.stderr)
-            return {"reviews": [], "photos": []}
-
-        result = data.get("result", {})
-
-        # ── Reviews ────────────────────────────────────────────────────
-        reviews = []
-        for rev in result.get("reviews", [])[:max_reviews]:
-            text = rev.get("text", "").strip()
-            if not text:
-                continue
-            reviews.append({
-                "author": rev.get("author_name", ""),
-                "rating": rev.get("rating", 0),
-                "text": text,
-                "time_ago": rev.get("relative_time_description", ""),
-            })
-
-        # ── Photos ─────────────────────────────────────────────────────
-        photos = []
-        for photo in result.get("photos", [])[:max_photos]:
-            ref = photo.get("photo_reference")
-            if not ref:
-                continue
-            url = (
-                f"{PHOTO_BASE}"
-                f"?maxwidth=1200"
-                f"&photo_reference={ref}"
-                f"&key={api_key}"
-            )
-            photos.append(url)
-
-        print(
-            f"[fetch_reviews] Got {len(reviews)} review(s) and {len(photos)} photo(s) "
-            f"for place_id={place_id}",
-            file=sys.stderr,
-        )
-        return {"reviews": reviews, "photos": photos}
-
+        return _fetch_place(place_id, api_key, max_reviews, max_photos)
     except Exception as e:
         print(f"[fetch_reviews] Failed for place_id={place_id}: {e}", file=sys.stderr)
         return {"reviews": [], "photos": []}
 
 
+# Reviews barely change day to day — re-runs over the same place_id are served from disk
+@memoize_to_disk("fetch_reviews", ttl_hours=24)
+def _fetch_place(place_id: str, api_key: str, max_reviews: int, max_photos: int) -> dict:
+    r = _HTTP.get(
+        f"{PLACES_API}/{place_id}",
+        params={"languageCode": "nl"},
+        headers={"X-Goog-Api-Key": api_key, "X-Goog-FieldMask": FIELD_MASK},
+        timeout=20,
+    )
+    r.raise_for_status()
+    result = orjson.loads(r.content)
+
+    # ── Reviews ────────────────────────────────────────────────────
+    reviews = []
+    for rev in result.get("reviews", [])[:max_reviews]:
+        text = rev.get("text", {}).get("text", "").strip()
+        if not text:
+            continue
+        reviews.append({
+            "author": rev.get("authorAttribution", {}).get("displayName", ""),
+            "rating": rev.get("rating", 0),
+            "text": text,
+            "time_ago": rev.get("relativePublishTimeDescription", ""),
+        })
+
+    # ── Photos ─────────────────────────────────────────────────────
+    photos = []
+    for photo in result.get("photos", [])[:max_photos]:
+        name = photo.get("name")  # "places/{place_id}/photos/{ref}"
+        if not name:
+            continue
+        url = (
+            f"{PHOTO_BASE}/{name}/media"
+            f"?maxWidthPx=1200"
+            f"&key={api_key}"
+        )
+        photos.append(url)
+
+    print(
+        f"[fetch_reviews] Got {len(reviews)} review(s) and {len(photos)} photo(s) "
+        f"for place_id={place_id}",
+        file=sys.stderr,
+    )
+    return {"reviews": reviews, "photos": photos}
+
+
 def format_for_prompt(place_data: dict) -> str:
     """Format reviews and photos as a prompt block for Claude."""
     reviews = place_data.get("reviews", [])
@@ -127,7 +138,7 @@ def main():
     args = parser.parse_args()
 
     data = fetch(args.place_id)
-    print(json.dumps(data, ensure_ascii=False, indent=2))
+    print(orjson.dumps(data, option=orjson.OPT_INDENT_2).decode())
 
 
 if __name__ == "__main__":
@@ -12,10 +12,11 @@ import sys
 import json
 import argparse
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
 sys.path.insert(0, os.path.dirname(__file__))
+import _env
+
+_env.load()
 import sheets_client
 
 
@@ -24,33 +25,58 @@ def get_go_rows(sheet_name: str = None, limit: int = None) -> list[dict]:
     if sheet_name is None:
         sheet_name = os.getenv("GOOGLE_SHEETS_PIPELINE_TEST", "Pipeline test")
 
-    client = sheets_client.get_client()
-    spreadsheet = client.open_by_key(os.getenv("GOOGLE_SHEETS_ID"))
-    worksheet = spreadsheet.worksheet(sheet_name)
+    worksheet = sheets_client.get_worksheet(sheet_name)
 
-    # Read all data including headers
-    all_values = worksheet.get_all_values()
-    if not all_values:
+    # Read the header row fresh on every run (ttl=0): the row values below are
+    # labeled with it, so a column inserted or moved since the cache was filled
+    # would mislabel them. This also refreshes the cached headers (memory and
+    # disk) that update_sheet addresses cells with for the rest of the run.
+    headers = sheets_client.get_headers(worksheet, ttl=0)
+    if not headers or "Status" not in headers:
+        print(f"[read_sheet] No 'Status' column in '{sheet_name}'", file=sys.stderr)
         return []
 
-    headers = all_values[0]
-    rows = []
+    # Fetch only the Status column first — a tiny payload even on big sheets
+    status_letter = sheets_client.get_column_map(worksheet)["Status"][1]
+    status_values = worksheet.get(f"{status_letter}2:{status_letter}")
 
-    total_rows = len(all_values) - 1
+    total_rows = len(status_values)
     print(f"[read_sheet] Scanning {total_rows} rows in '{sheet_name}'...", file=sys.stderr)
 
-    for row_idx, row_values in enumerate(all_values[1:], start=2):  # row 1 = header
+    go_rows = []
+    for row_idx, cell in enumerate(status_values, start=2):  # row 1 = header
+        if cell and cell[0].strip().upper() == "GO":
+            go_rows.append(row_idx)
+            if limit and len(go_rows) >= limit:
+                break
+
+    if not go_rows:
+        print(f"[read_sheet] Found 0 GO row(s) out of {total_rows} total.", file=sys.stderr)
+        return []
+
+    # Then fetch just those rows, all in one values:batchGet call
+    last_letter = sheets_client.col_index_to_letter(len(headers))
+    sheet_ref = sheets_client.quote_sheet_name(sheet_name)
+    response = sheets_client.get_spreadsheet().values_batch_get(
+        ranges=[f"{sheet_ref}!A{r}:{last_letter}{r}" for r in go_rows],
+    )
+
+    col_map = sheets_client.get_column_map(worksheet)
+    rows = []
+    seen = {}
+    for row_idx, value_range in zip(go_rows, response.get("valueRanges", [])):
+        row_values = (value_range.get("values") or [[]])[0]
         # Pad row to header length if needed
-        while len(row_values) < len(headers):
-            row_values.append("")
+        row_values = row_values + [""] * (len(headers) - len(row_values))
 
         row_dict = dict(zip(headers, row_values))
         row_dict["_row"] = row_idx  # actual sheet row number for updates
+        rows.append(row_dict)
+        seen[row_idx] = {header: row_values[idx - 1] for header, (idx, _) in col_map.items()}
 
-        if row_dict.get("Status", "").strip().upper() == "GO":
-            rows.append(row_dict)
-            if limit and len(rows) >= limit:
-                break
+    # What's in the sheet now is what later writes get compared against —
+    # e.g. a row reset to GO by hand must still get its "Deployed" written
+    sheets_client.remember_values(sheet_name, seen)
 
     print(f"[read_sheet] Found {len(rows)} GO row(s) out of {total_rows} total.", file=sys.stderr)
     return rows
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Run the build → deploy → draft stages for many businesses concurrently.
+
+Every stage is bound by API latency (Firecrawl, Claude, Netlify), so a single
+business leaves CPU and network idle for minutes. Businesses are independent,
+so running them side by side in a thread pool overlaps all that waiting.
+No Google Sheet involved — input is a JSONL file.
+
+Usage:
+    python Tools/run_batch.py --input businesses.jsonl [--workers 10] [--out .tmp/batch_results.jsonl]
+
+Input:  one JSON object per line, same keys as a Pipeline sheet row
+        ("Business Name", "Website", "Google Place ID", "City", ...).
+Output: one JSON object per business with the live URL and email draft
+        (or the error), written to --out. Path printed to stdout.
+"""
+
+import sys
+import os
+import json
+import argparse
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+sys.path.insert(0, os.path.dirname(__file__))
+import _env
+
+_env.load()
+
+import scrape_website
+import fetch_reviews
+import build_website
+import deploy_netlify
+import draft_email
+
+TMP_DIR = os.path.join(os.path.dirname(__file__), "..", ".tmp")
+DEFAULT_WORKERS = 10
+
+
+def process_one(business_data: dict) -> dict:
+    """Scrape, build, deploy and draft for one business. Never raises."""
+    business_name = business_data.get("Business Name", "").strip() or "onbekend"
+    try:
+        scraped_text = scrape_website.scrape(business_data.get("Website", "").strip())
+        place_data = fetch_reviews.fetch(business_data.get("Google Place ID", "").strip())
+        reviews_text = fetch_reviews.format_for_prompt(place_data)
+
+        html = build_website.build_website(business_data, scraped_text, reviews_text)
+
+        html_path = build_website.save_html(business_name, html)
+
+        live_url = deploy_netlify.deploy(html_path, business_name)
+        email_body = draft_email.draft_email(business_data, live_url, scraped_text, reviews_text)
+
+        return {
+            "business_name": business_name,
+            "status": "ok",
+            "preview_url": live_url,
+            "email_draft": email_body,
+        }
+    except Exception as e:
+        print(f"[run_batch] ERROR for '{business_name}': {type(e).__name__}: {e}", file=sys.stderr)
+        print(traceback.format_exc(), file=sys.stderr)
+        return {
+            "business_name": business_name,
+            "status": "error",
+            "error": f"{type(e).__name__}: {e}"[:500],
+        }
+
+
+def run_batch(businesses: list[dict], workers: int = DEFAULT_WORKERS) -> list[dict]:
+    """Process businesses concurrently, returning results in input order."""
+    os.makedirs(TMP_DIR, exist_ok=True)
+
+    results = [None] * len(businesses)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(process_one, b): i for i, b in enumerate(businesses)}
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            results[i] = future.result()
+            print(
+                f"[run_batch] {done}/{len(businesses)} done: "
+                f"{results[i]['business_name']} ({results[i]['status']})",
+                file=sys.stderr,
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build, deploy and draft for a JSONL batch of businesses")
+    parser.add_argument("--input", required=True, help="JSONL file, one business per line")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help=f"Concurrent businesses (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--out", default=os.path.join(TMP_DIR, "batch_results.jsonl"), help="Output JSONL path")
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        businesses = [json.loads(line) for line in f if line.strip()]
+
+    print(f"[run_batch] {len(businesses)} business(es), {args.workers} worker(s)", file=sys.stderr)
+    results = run_batch(businesses, workers=args.workers)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        for result in results:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    print(args.out)  # stdout: path to the results file
+
+
+if __name__ == "__main__":
+    main()
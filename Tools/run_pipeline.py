@@ -17,12 +17,14 @@ Options:
 import sys
 import os
 import json
+import asyncio
 import argparse
 import traceback
-from dotenv import load_dotenv
 
-load_dotenv()
 sys.path.insert(0, os.path.dirname(__file__))
+import _env
+
+_env.load()
 
 import read_sheet
 import update_sheet
@@ -35,6 +37,153 @@ import send_email
 
 TMP_DIR = os.path.join(os.path.dirname(__file__), "..", ".tmp")
 
+# Rows are processed concurrently; each external service gets its own cap so
+# we stay inside its rate limits (Claude is both the tightest and the slowest).
+SERVICE_LIMITS = {
+    "firecrawl": 3,
+    "places": 5,
+    "claude": 2,
+    "netlify": 3,
+    "email": 1,
+    "sheets": 5,
+}
+
+_semaphores: dict[str, asyncio.Semaphore] = {}
+
+
+async def _call(service: str, fn, *args, **kwargs):
+    """Run a blocking tool call in a worker thread while holding a slot for its service."""
+    async with _semaphores[service]:
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+
+async def process_row(sheet_name: str, row: dict) -> dict:
+    """Run one row through the pipeline. Returns its final-state sheet updates, left for the caller to write."""
+    row_num = row["_row"]
+    business_name = row.get("Business Name", "").strip() or f"Row {row_num}"
+    website_url = row.get("Website", "").strip()
+
+    print(f"--- Processing: {business_name} (row {row_num}) ---")
+
+    # SCRAPING is written right away: moving the row off GO is what stops
+    # another run (e.g. the Railway poller) from picking it up too. Later
+    # intermediate statuses are only staged; the sheet is written at the
+    # points where the row reaches a state worth seeing (or fails).
+    buf = update_sheet.RowUpdateBuffer(sheet_name, row_num)
+    pending_write = None
+
+    try:
+        # ── SCRAPING ──────────────────────────────────────────────────
+        buf.stage({"Status": "SCRAPING"})
+        await _call("sheets", buf.flush)
+        scraped_text = await _call("firecrawl", scrape_website.scrape, website_url)
+
+        # ── FETCH REVIEWS + PHOTOS ────────────────────────────────────
+        place_id = row.get("Google Place ID", "").strip()
+        place_data = await _call("places", fetch_reviews.fetch, place_id)
+        reviews_text = fetch_reviews.format_for_prompt(place_data)
+
+        # ── BUILDING ──────────────────────────────────────────────────
+        buf.stage({"Status": "BUILDING"})
+
+        # Strip internal keys before sending to Claude
+        business_data = {k: v for k, v in row.items() if not k.startswith("_")}
+        html = await _call("claude", build_website.build_website, business_data, scraped_text, reviews_text)
+
+        # Save HTML to .tmp for inspection / debugging
+        html_path = build_website.save_html(business_name, html)
+        print(f"  HTML saved to: {html_path}")
+
+        # ── DEPLOYING ─────────────────────────────────────────────────
+        buf.stage({"Status": "DEPLOYING"})
+        live_url = await _call("netlify", deploy_netlify.deploy, html_path, business_name)
+
+        # ── DEPLOYED ──────────────────────────────────────────────────
+        buf.stage({
+            "Status": "Deployed",
+            "Preview URL": live_url,
+        })
+        # Write in the background; drafting doesn't depend on the sheet. The
+        # updates are taken here, before the task starts, so the statuses
+        # staged below can't leak into (or race with) this write.
+        pending_write = asyncio.create_task(
+            _call("sheets", update_sheet.update_row, sheet_name, row_num, buf.take())
+        )
+        print(f"  Deployed: {live_url}")
+
+        # ── EMAIL DRAFTING ────────────────────────────────────────────
+        email_status = row.get("Email Status", "").strip().upper()
+        if email_status in ("BLACKLISTED", "INVALID"):
+            print(f"  Skipping email: Email Status is {row.get('Email Status')}")
+            await pending_write
+            print(f"  Deployed (no email)\n")
+            return buf.take()
+
+        buf.stage({"Status": "EMAILING"})
+        email_body = await _call("claude", draft_email.draft_email, business_data, live_url, scraped_text, reviews_text)
+        await pending_write
+        buf.stage({
+            "Status": "Email Draft Written",
+            "Email Draft": email_body,
+        })
+        print(f"  Email Draft Written")
+
+        # ── SENDING ──────────────────────────────────────────────────
+        to_email = row.get("Email", "").strip()
+        if not to_email:
+            print(f"  Skipping send: no email address in sheet")
+            print(f"  Email Draft Written (no recipient)\n")
+            return buf.take()
+
+        buf.stage({"Status": "SENDING"})
+        test_mode = bool(os.getenv("RESEND_TEST_EMAIL") or os.getenv("SMTP_TEST_EMAIL"))
+        send_result = await _call(
+            "email",
+            send_email.send_email,
+            to_email=to_email,
+            email_body=email_body,
+            business_name=business_name,
+            test_mode=test_mode,
+        )
+
+        # ── SENT ────────────────────────────────────────────────────
+        from datetime import datetime
+        sent_date = datetime.now().strftime("%Y-%m-%d %H:%M")
+        buf.stage({
+            "Status": "Email sent succesfully",
+            "Sent Date": sent_date,
+        })
+        print(f"  Email sent succesfully ({sent_date})\n")
+        return buf.take()
+
+    except Exception as e:
+        tb = traceback.format_exc()
+        error_msg = f"{type(e).__name__}: {e}"
+        print(f"  ERROR: {error_msg}", file=sys.stderr)
+        print(tb, file=sys.stderr)
+
+        # Let an in-flight write land first so it can't overwrite ERROR
+        if pending_write is not None:
+            await asyncio.gather(pending_write, return_exceptions=True)
+
+        buf.stage({
+            "Status": "ERROR",
+            "Notes": error_msg[:500],
+        })
+        return buf.take()
+
+
+async def _run_rows(sheet_name: str, rows: list[dict]) -> None:
+    _semaphores.clear()
+    _semaphores.update({name: asyncio.Semaphore(n) for name, n in SERVICE_LIMITS.items()})
+    results = await asyncio.gather(*(process_row(sheet_name, row) for row in rows))
+
+    # Final states for every row go out together in one batchUpdate
+    # instead of one write per row
+    final_updates = {row["_row"]: updates for row, updates in zip(rows, results) if updates}
+    if final_updates:
+        await _call("sheets", update_sheet.update_rows, sheet_name, final_updates)
+
 
 def run(sheet_name: str = "Pipeline test", limit: int = 1) -> None:
     os.makedirs(TMP_DIR, exist_ok=True)
@@ -49,100 +198,7 @@ def run(sheet_name: str = "Pipeline test", limit: int = 1) -> None:
 
     print(f"Found {len(rows)} row(s) to process.\n")
 
-    for row in rows:
-        row_num = row["_row"]
-        business_name = row.get("Business Name", "").strip() or f"Row {row_num}"
-        website_url = row.get("Website", "").strip()
-
-        print(f"--- Processing: {business_name} (row {row_num}) ---")
-
-        try:
-            # ── SCRAPING ──────────────────────────────────────────────────
-            update_sheet.update_row(sheet_name, row_num, {"Status": "SCRAPING"})
-            scraped_text = scrape_website.scrape(website_url)
-
-            # ── FETCH REVIEWS + PHOTOS ────────────────────────────────────
-            place_id = row.get("Google Place ID", "").strip()
-            place_data = fetch_reviews.fetch(place_id)
-            reviews_text = fetch_reviews.format_for_prompt(place_data)
-
-            # ── BUILDING ──────────────────────────────────────────────────
-            update_sheet.update_row(sheet_name, row_num, {"Status": "BUILDING"})
-
-            # Strip internal keys before sending to Claude
-            business_data = {k: v for k, v in row.items() if not k.startswith("_")}
-            html = build_website.build_website(business_data, scraped_text, reviews_text)
-
-            # Save HTML to .tmp for inspection / debugging
-            safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in business_name)[:50]
-            html_path = os.path.join(TMP_DIR, f"{safe_name}.html")
-            with open(html_path, "w", encoding="utf-8") as f:
-                f.write(html)
-            print(f"  HTML saved to: {html_path}")
-
-            # ── DEPLOYING ─────────────────────────────────────────────────
-            update_sheet.update_row(sheet_name, row_num, {"Status": "DEPLOYING"})
-            live_url = deploy_netlify.deploy(html, business_name)
-
-            # ── DEPLOYED ──────────────────────────────────────────────────
-            update_sheet.update_row(sheet_name, row_num, {
-                "Status": "Deployed",
-                "Preview URL": live_url,
-            })
-            print(f"  Deployed: {live_url}")
-
-            # ── EMAIL DRAFTING ────────────────────────────────────────────
-            email_status = row.get("Email Status", "").strip().upper()
-            if email_status in ("BLACKLISTED", "INVALID"):
-                print(f"  Skipping email: Email Status is {row.get('Email Status')}")
-                update_sheet.update_row(sheet_name, row_num, {"Status": "Deployed"})
-                print(f"  Deployed (no email)\n")
-                continue
-
-            update_sheet.update_row(sheet_name, row_num, {"Status": "EMAILING"})
-            email_body = draft_email.draft_email(business_data, live_url, scraped_text, reviews_text)
-            update_sheet.update_row(sheet_name, row_num, {
-                "Status": "Email Draft Written",
-                "Email Draft": email_body,
-            })
-            print(f"  Email Draft Written")
-
-            # ── SENDING ──────────────────────────────────────────────────
-            to_email = row.get("Email", "").strip()
-            if not to_email:
-                print(f"  Skipping send: no email address in sheet")
-                update_sheet.update_row(sheet_name, row_num, {"Status": "Email Draft Written"})
-                print(f"  Email Draft Written (no recipient)\n")
-                continue
-
-            update_sheet.update_row(sheet_name, row_num, {"Status": "SENDING"})
-            test_mode = bool(os.getenv("RESEND_TEST_EMAIL") or os.getenv("SMTP_TEST_EMAIL"))
-            send_result = send_email.send_email(
-                to_email=to_email,
-                email_body=email_body,
-                business_name=business_name,
-                test_mode=test_mode,
-            )
-
-            # ── SENT ────────────────────────────────────────────────────
-            from datetime import datetime
-            sent_date = datetime.now().strftime("%Y-%m-%d %H:%M")
-            update_sheet.update_row(sheet_name, row_num, {
-                "Status": "Email sent succesfully",
-                "Sent Date": sent_date,
-            })
-            print(f"  Email sent succesfully ({sent_date})\n")
-
-        except Exception as e:
-            tb = traceback.format_exc()
-            error_msg = f"{type(e).__name__}: {e}"
-            print(f"  ERROR: {error_msg}", file=sys.stderr)
-            print(tb, file=sys.stderr)
-
-            update_sheet.update_row(sheet_name, row_num, {
-                "Status": "ERROR",
-                "Notes": error_msg[:500],
-            })
+    asyncio.run(_run_rows(sheet_name, rows))
 
     print("=== Pipeline complete ===\n")
 
@@ -19,53 +19,83 @@ import argparse
 import os
 import time
 from urllib.parse import urlparse, unquote
+import orjson
 import requests
-from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-load_dotenv()
+sys.path.insert(0, os.path.dirname(__file__))
+import _env
+from _cache import memoize_to_disk
+
+_env.load()
 
 DEFAULT_MAX_CHARS = 8000
 FIRECRAWL_API = "https://api.firecrawl.dev/v1"
-CRAWL_POLL_INTERVAL = 3  # seconds between status checks
-CRAWL_TIMEOUT = 45       # max seconds to wait for crawl
+CRAWL_POLL_INITIAL = 0.3  # first status check after this many seconds...
+CRAWL_POLL_FACTOR = 1.5   # ...then back off by this factor...
+CRAWL_POLL_MAX = 3.0      # ...up to this interval between checks
+CRAWL_TIMEOUT = 45        # max seconds to wait for crawl
 
+MAX_RESPONSE_BYTES = 5_000_000  # abort payloads past this; we keep ~8k chars anyway
 
-def _get_headers():
-    api_key = os.getenv("FIRECRAWL_API_KEY")
-    return {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
+_NL3 = re.compile(r"\n{3,}")  # runs of blank lines, collapsed to one
+
+
+# One pooled session per process: the crawl start, every status poll and the
+# single-page fallback all reuse the same keep-alive connection to Firecrawl.
+_SESSION = requests.Session()
+_SESSION.headers["Authorization"] = f"Bearer {os.getenv('FIRECRAWL_API_KEY')}"
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+))
+
+
+def _read_json(response: requests.Response) -> dict:
+    """Read a streamed response body, giving up once it passes MAX_RESPONSE_BYTES."""
+    declared = int(response.headers.get("Content-Length") or 0)
+    if declared > MAX_RESPONSE_BYTES:
+        response.close()
+        raise RuntimeError(f"Response too large ({declared} bytes)")
+
+    body = bytearray()
+    for chunk in response.iter_content(chunk_size=65536):
+        body += chunk
+        if len(body) > MAX_RESPONSE_BYTES:
+            response.close()
+            raise RuntimeError(f"Response exceeded {MAX_RESPONSE_BYTES} bytes")
+    return orjson.loads(body)
 
 
 def _scrape_single(url: str, max_chars: int) -> str:
     """Fallback: scrape just the homepage."""
-    response = requests.post(
+    response = _SESSION.post(
         f"{FIRECRAWL_API}/scrape",
-        headers=_get_headers(),
         json={
             "url": url,
             "formats": ["markdown"],
             "onlyMainContent": True,
         },
         timeout=30,
+        stream=True,
     )
     response.raise_for_status()
-    data = response.json()
+    data = _read_json(response)
 
     if not data.get("success"):
         return ""
 
     text = data.get("data", {}).get("markdown", "")
-    text = re.sub(r"\n{3,}", "\n\n", text).strip()
+    text = _NL3.sub("\n\n", text).strip()
     return text[:max_chars] + "..." if len(text) > max_chars else text
 
 
 def _crawl_site(url: str, max_chars: int) -> str:
     """Crawl homepage + subpages, return combined markdown."""
-    r = requests.post(
+    r = _SESSION.post(
         f"{FIRECRAWL_API}/crawl",
-        headers=_get_headers(),
         json={
             "url": url,
             "maxDepth": 1,
@@ -84,17 +114,20 @@ def _crawl_site(url: str, max_chars: int) -> str:
 
     print(f"[scrape_website] Crawl started: {crawl_id}", file=sys.stderr)
 
-    # Poll for completion
+    # Poll for completion: check early so small crawls return right away,
+    # then back off so long crawls don't burn API calls
     deadline = time.time() + CRAWL_TIMEOUT
+    delay = CRAWL_POLL_INITIAL
     while time.time() < deadline:
-        time.sleep(CRAWL_POLL_INTERVAL)
-        r = requests.get(
+        time.sleep(min(delay, max(0.0, deadline - time.time())))
+        delay = min(delay * CRAWL_POLL_FACTOR, CRAWL_POLL_MAX)
+        r = _SESSION.get(
             f"{FIRECRAWL_API}/crawl/{crawl_id}",
-            headers=_get_headers(),
             timeout=15,
+            stream=True,
         )
         r.raise_for_status()
-        result = r.json()
+        result = _read_json(r)
         status = result.get("status")
 
         if status == "completed":
@@ -109,7 +142,7 @@ def _crawl_site(url: str, max_chars: int) -> str:
                     sections.append(f"--- PAGE: {page_url} ---\n{md}")
 
             combined = "\n\n".join(sections)
-            combined = re.sub(r"\n{3,}", "\n\n", combined).strip()
+            combined = _NL3.sub("\n\n", combined).strip()
             return combined[:max_chars] + "..." if len(combined) > max_chars else combined
 
         if status == "failed":
@@ -151,8 +184,12 @@ def scrape(url: str, max_chars: int = DEFAULT_MAX_CHARS) -> str:
         print("[scrape_website] FIRECRAWL_API_KEY not set, skipping scrape", file=sys.stderr)
         return ""
 
-    url = _normalize_url(url)
+    return _scrape_url(_normalize_url(url), max_chars)
+
 
+# Re-runs over the same site (dev, ERROR retries) are served from disk
+@memoize_to_disk("scrape_website", ttl_hours=24)
+def _scrape_url(url: str, max_chars: int) -> str:
     # Try multi-page crawl first
     try:
         text = _crawl_site(url, max_chars)
@@ -16,14 +16,54 @@ import sys
 import os
 import json
 import time
+import random
 import argparse
-from dotenv import load_dotenv
+import requests
 import resend
 from email_template import build_html_email
 
-load_dotenv()
+sys.path.insert(0, os.path.dirname(__file__))
+import _env
+
+_env.load()
 
 MAX_RETRIES = 3
+RETRY_DELAYS = [5, 10, 20]  # base seconds before retry 1, 2, ...
+
+# Sender identity only depends on the environment — resolve it once
+FROM_NAME = os.getenv("RESEND_FROM_NAME", os.getenv("SMTP_FROM_NAME", "Dan van AiBoostly"))
+FROM_EMAIL = os.getenv("RESEND_FROM_EMAIL", os.getenv("SMTP_FROM_EMAIL", "dan@contact.aiboostly.com"))
+_FROM_HEADER = f"{FROM_NAME} <{FROM_EMAIL}>"
+
+
+class _SessionClient(resend.HTTPClient):
+    """Resend transport on one pooled requests.Session.
+
+    The SDK's default client calls requests.request() per send, paying a
+    fresh TCP + TLS handshake to api.resend.com for every email.
+    """
+
+    def __init__(self, timeout: int = 30):
+        self._timeout = timeout
+        self._session = requests.Session()
+
+    def request(self, method, url, headers, json=None, **kwargs):
+        try:
+            resp = self._session.request(
+                method=method,
+                url=url,
+                headers=headers,
+                json=json,
+                timeout=self._timeout,
+                **kwargs,
+            )
+            return resp.content, resp.status_code, resp.headers
+        except requests.RequestException as e:
+            # The SDK turns this into a ResendError, same as its own client
+            raise RuntimeError(f"Request failed: {e}") from e
+
+
+resend.default_http_client = _SessionClient()
 
 
 def send_email(
@@ -44,9 +84,6 @@ def send_email(
 
     resend.api_key = api_key
 
-    from_name = os.getenv("RESEND_FROM_NAME", os.getenv("SMTP_FROM_NAME", "Dan van AiBoostly"))
-    from_email = os.getenv("RESEND_FROM_EMAIL", os.getenv("SMTP_FROM_EMAIL", "dan@contact.aiboostly.com"))
-
     # Test mode: redirect to test email
     actual_recipient = to_email
     if test_mode:
@@ -62,18 +99,19 @@ def send_email(
 
     print(f"[send_email] Sending to {actual_recipient} via Resend...", file=sys.stderr)
 
+    # Built once — retries resend the same payload
+    params: resend.Emails.SendParams = {
+        "from": _FROM_HEADER,
+        "to": [actual_recipient],
+        "subject": subject,
+        "html": html_body,
+        "text": email_body,
+        "reply_to": _FROM_HEADER,
+    }
+
     last_error = None
     for attempt in range(MAX_RETRIES):
         try:
-            params: resend.Emails.SendParams = {
-                "from": f"{from_name} <{from_email}>",
-                "to": [actual_recipient],
-                "subject": subject,
-                "html": html_body,
-                "text": email_body,
-                "reply_to": f"{from_name} <{from_email}>",
-            }
-
             result = resend.Emails.send(params)
 
             print(f"[send_email] Sent successfully to {actual_recipient} (id: {result.get('id', 'unknown')})", file=sys.stderr)
@@ -87,8 +125,9 @@ def send_email(
         except Exception as e:
             last_error = e
             if attempt < MAX_RETRIES - 1:
-                wait = [5, 10, 20][attempt]
-                print(f"[send_email] Resend error, retrying in {wait}s (attempt {attempt+1}/{MAX_RETRIES}): {e}", file=sys.stderr)
+                # Jittered so concurrent rows that failed together don't retry in lockstep
+                wait = RETRY_DELAYS[attempt] * (0.5 + random.random())
+                print(f"[send_email] Resend error, retrying in {wait:.1f}s (attempt {attempt+1}/{MAX_RETRIES}): {e}", file=sys.stderr)
                 time.sleep(wait)
                 continue
             raise
@@ -7,20 +7,23 @@ No local server needed. Steps:
 2. You open it in your browser and approve
 3. Google redirects to localhost (it will error — that's fine)
 4. Copy the FULL URL from the browser address bar and paste it here
-5. Done — token.pickle is saved
+5. Done — token.json is saved
 
 Run: python Tools/setup_google_auth.py
 """
 
 import os
-import pickle
+import sys
 from urllib.parse import urlparse, parse_qs
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 
-SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
-CREDENTIALS_PATH = os.path.join(os.path.dirname(__file__), "..", "credentials.json")
-TOKEN_PATH = os.path.join(os.path.dirname(__file__), "..", "token.pickle")
+sys.path.insert(0, os.path.dirname(__file__))
+import sheets_client
+
+SCOPES = sheets_client.SCOPES
+CREDENTIALS_PATH = sheets_client.CREDENTIALS_PATH
+TOKEN_PATH = sheets_client.TOKEN_PATH
 
 
 def setup():
@@ -31,20 +34,17 @@ def setup():
         print(f"ERROR: credentials.json not found at {creds_path}")
         return
 
-    # Check if existing token is still valid
-    if os.path.exists(token_path):
-        with open(token_path, "rb") as f:
-            creds = pickle.load(f)
-        if creds and creds.valid:
-            print("Token is already valid. Nothing to do.")
-            return
-        if creds and creds.expired and creds.refresh_token:
-            print("Refreshing expired token...")
-            creds.refresh(Request())
-            with open(token_path, "wb") as f:
-                pickle.dump(creds, f)
-            print(f"Token refreshed: {token_path}")
-            return
+    # Check if existing token (token.json or legacy token.pickle) is still valid
+    creds = sheets_client.load_credentials()
+    if creds and creds.valid:
+        print("Token is already valid. Nothing to do.")
+        return
+    if creds and creds.expired and creds.refresh_token:
+        print("Refreshing expired token...")
+        creds.refresh(Request())
+        sheets_client.save_credentials(creds)
+        print(f"Token refreshed: {token_path}")
+        return
 
     # Build the flow with http://localhost as redirect URI (matches credentials.json)
     flow = InstalledAppFlow.from_client_secrets_file(
@@ -85,8 +85,7 @@ def setup():
     flow.fetch_token(code=code)
     creds = flow.credentials
 
-    with open(token_path, "wb") as f:
-        pickle.dump(creds, f)
+    sheets_client.save_credentials(creds)
 
     print(f"Success! Token saved to {token_path}")
     print("You can now run: python Tools/run_pipeline.py")
@@ -1,42 +1,453 @@
 """
 Shared Google Sheets auth helper.
 
-First-time setup: run Tools/setup_google_auth.py to generate token.pickle.
-Subsequent runs reuse and auto-refresh the cached token.
+First-time setup: run Tools/setup_google_auth.py to generate token.json.
+Subsequent runs reuse and auto-refresh the cached token. A legacy
+token.pickle is still read and converted to token.json on first use.
+
+Without either file, Application Default Credentials are used (a service
+account via GOOGLE_APPLICATION_CREDENTIALS, or the metadata server on
+GCE / Cloud Run / GKE with workload identity), so cloud deployments need
+no token file at all.
 """
 
+from __future__ import annotations
+
 import os
+import sys
+import json
+import time
 import pickle
-import gspread
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
+import sqlite3
+import tempfile
+import functools
+from typing import TYPE_CHECKING
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+try:
+    import fcntl
+except ImportError:  # Windows: the write bucket file is still shared, just not locked
+    fcntl = None
+
+# gspread and google-auth take most of a tool's start-up time; they are
+# imported on first use so CLIs that never reach the API don't pay for them.
+if TYPE_CHECKING:
+    import gspread
 
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
-TOKEN_PATH = os.path.join(os.path.dirname(__file__), "..", "token.pickle")
+SHEETS_API = "https://sheets.googleapis.com/v4/spreadsheets"
+TOKEN_PATH = os.path.join(os.path.dirname(__file__), "..", "token.json")
+LEGACY_TOKEN_PATH = os.path.join(os.path.dirname(__file__), "..", "token.pickle")
 CREDENTIALS_PATH = os.path.join(os.path.dirname(__file__), "..", "credentials.json")
 
+# Per-process handles and header cache: a pipeline run touches the same sheet
+# dozens of times, and neither the spreadsheet nor its header row changes mid-run.
+_CLIENT_CACHE = None
+_spreadsheet = None
+_worksheets: dict[str, gspread.Worksheet] = {}
+_HEADER_CACHE: dict[tuple[str, str], tuple[float, list[str], dict[str, tuple[int, str]], int]] = {}
+
+# Headers (and the sheet's numeric id) are also kept on disk so a short-lived
+# CLI call (update_sheet.py from a workflow) can write without first opening
+# the spreadsheet, looking up the worksheet and reading row 1.
+# One file per spreadsheet: {sheet_name: {"ts": epoch, "headers": [...],
+# "columns": {header: [index, letter]}, "sheet_id": gid}}
+# Writes address cells by column index, so a column inserted while a stale
+# entry is in use sends values into the wrong cells. The disk tier is only
+# meant for a burst of short-lived CLI calls and keeps entries for at most
+# HEADER_DISK_TTL; pipeline runs start from the fresh row 1 read_sheet reads.
+HEADER_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "claude-agentic")
+HEADER_DISK_TTL = 60  # seconds
+
+_ALPHA = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# Last value written to (or read from) each cell, shared by every process on
+# this machine, so re-sending a value the cell already holds ("Deployed"
+# again) costs no write quota. Entries expire quickly since the sheet can
+# also be edited by hand.
+LAST_VALUES_PATH = os.path.join(HEADER_CACHE_DIR, "last_values.db")
+LAST_VALUES_TTL = 600  # seconds
+
+# Sheets allows 60 write requests per minute per user. Every process writing
+# to the sheet (pipeline, CLI calls, the update_sheet daemon) draws from one
+# token bucket in a flock'd file. A full bucket plus a minute of refill is
+# 10 + 50 = 60 writes, so together they stay under the limit in any 60s window
+# instead of bursting into 429s and the cooldown that follows.
+WRITE_BUCKET_PATH = os.path.join(tempfile.gettempdir(), "update_sheet.tokens.json")
+WRITE_BUCKET_CAPACITY = 10
+WRITE_BUCKET_RATE = 50 / 60  # tokens per second
+WRITE_MAX_ATTEMPTS = 5
+
+# Keep-alive connections to sheets.googleapis.com held by the client's session.
+# Matches run_pipeline's "sheets" concurrency so parallel rows never open
+# (and then discard) connections beyond the pool.
+SHEETS_POOL_SIZE = 5
 
-def get_client() -> gspread.Client:
-    """Return an authenticated gspread client, refreshing token if needed."""
-    creds = None
+
+def load_credentials():
+    """Read token.json, falling back to (and migrating) a legacy token.pickle."""
+    from google.oauth2.credentials import Credentials
 
     token_path = os.path.abspath(TOKEN_PATH)
     if os.path.exists(token_path):
-        with open(token_path, "rb") as f:
+        return Credentials.from_authorized_user_file(token_path, SCOPES)
+
+    legacy_path = os.path.abspath(LEGACY_TOKEN_PATH)
+    if os.path.exists(legacy_path):
+        with open(legacy_path, "rb") as f:
             creds = pickle.load(f)
+        try:
+            save_credentials(creds)
+        except OSError:
+            pass  # still usable from the pickle; conversion retried next run
+        return creds
+
+    return None
+
+
+def save_credentials(creds) -> None:
+    """Write credentials to token.json."""
+    with open(os.path.abspath(TOKEN_PATH), "w", encoding="utf-8") as f:
+        f.write(creds.to_json())
+
+
+def _default_credentials():
+    """Application Default Credentials with a fresh access token, or None if there are none."""
+    import google.auth
+    from google.auth.exceptions import DefaultCredentialsError, RefreshError
+    from google.auth.transport.requests import Request
+
+    try:
+        creds, _ = google.auth.default(scopes=SCOPES)
+        creds.refresh(Request())
+    except (DefaultCredentialsError, RefreshError):
+        return None
+    return creds
+
+
+def _save_refreshed(creds) -> None:
+    try:
+        save_credentials(creds)
+    except OSError:
+        pass  # Railway ephemeral filesystem — refresh worked, just can't persist
+
+
+def get_client() -> gspread.Client:
+    """Return an authenticated gspread client, refreshing token if needed.
+
+    The client is built once per process and kept for its lifetime; an
+    expired access token is refreshed on the same client, so the pooled
+    keep-alive connections (and their TLS sessions) are reused by every call.
+    """
+    global _CLIENT_CACHE
+    from google.auth.transport.requests import Request
+
+    if _CLIENT_CACHE is not None:
+        creds, client, from_token_file = _CLIENT_CACHE
+        if not creds.valid:
+            # Refresh in place: the client's session (and its warm TLS
+            # connections) stays, only the bearer token changes.
+            creds.refresh(Request())
+            if from_token_file:
+                _save_refreshed(creds)
+        return client
+
+    import gspread
+    from requests.adapters import HTTPAdapter
+
+    creds, from_token_file = load_credentials(), True
+    if creds is None:
+        creds, from_token_file = _default_credentials(), False
 
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
             creds.refresh(Request())
-            try:
-                with open(token_path, "wb") as f:
-                    pickle.dump(creds, f)
-            except OSError:
-                pass  # Railway ephemeral filesystem — refresh worked, just can't persist
+            _save_refreshed(creds)
         else:
             raise RuntimeError(
                 "No valid Google credentials found.\n"
                 "Run: python Tools/setup_google_auth.py"
             )
 
-    return gspread.authorize(creds)
+    client = gspread.authorize(creds)
+    client.http_client.session.mount("https://", HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=SHEETS_POOL_SIZE,
+    ))
+    _CLIENT_CACHE = (creds, client, from_token_file)
+    return client
+
+
+def get_spreadsheet() -> gspread.Spreadsheet:
+    """Return the GOOGLE_SHEETS_ID spreadsheet, opening it only once per process."""
+    global _spreadsheet
+    if _spreadsheet is None:
+        _spreadsheet = get_client().open_by_key(os.getenv("GOOGLE_SHEETS_ID"))
+    return _spreadsheet
+
+
+def get_worksheet(sheet_name: str) -> gspread.Worksheet:
+    """Return the named worksheet, looked up only once per process."""
+    worksheet = _worksheets.get(sheet_name)
+    if worksheet is None:
+        worksheet = get_spreadsheet().worksheet(sheet_name)
+        _worksheets[sheet_name] = worksheet
+    return worksheet
+
+
+def _header_cache_path(spreadsheet_id: str) -> str:
+    return os.path.join(HEADER_CACHE_DIR, f"headers-{spreadsheet_id}.json")
+
+
+def _read_header_file(spreadsheet_id: str) -> dict:
+    try:
+        with open(_header_cache_path(spreadsheet_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_header_file(spreadsheet_id: str, entries: dict) -> None:
+    """Write atomically (temp file + os.replace); a failed write only costs a refetch."""
+    path = _header_cache_path(spreadsheet_id)
+    try:
+        os.makedirs(HEADER_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def _header_entry(sheet_name: str, ttl: float, spreadsheet_id: str = None) -> tuple[float, list[str], dict[str, tuple[int, str]], int]:
+    spreadsheet_id = spreadsheet_id or os.getenv("GOOGLE_SHEETS_ID")
+    key = (spreadsheet_id, sheet_name)
+    cached = _HEADER_CACHE.get(key)
+    if cached and time.time() - cached[0] < ttl:
+        return cached
+
+    on_disk = _read_header_file(spreadsheet_id).get(sheet_name)
+    if on_disk and time.time() - on_disk["ts"] < min(ttl, HEADER_DISK_TTL) and "columns" in on_disk and "sheet_id" in on_disk:
+        fetched_at, headers, sheet_id = on_disk["ts"], on_disk["headers"], on_disk["sheet_id"]
+        col_map = {header: tuple(pos) for header, pos in on_disk["columns"].items()}
+    else:
+        worksheet = get_worksheet(sheet_name)
+        fetched_at, headers, sheet_id = time.time(), worksheet.row_values(1), worksheet.id
+        col_map = {}
+        for idx, header in enumerate(headers, 1):
+            col_map.setdefault(header, (idx, col_index_to_letter(idx)))  # first column wins, like list.index
+        entries = _read_header_file(spreadsheet_id)
+        entries[sheet_name] = {"ts": fetched_at, "headers": headers, "columns": col_map, "sheet_id": sheet_id}
+        _write_header_file(spreadsheet_id, entries)
+
+    _HEADER_CACHE[key] = (fetched_at, headers, col_map, sheet_id)
+    return _HEADER_CACHE[key]
+
+
+def get_headers(worksheet: gspread.Worksheet, ttl: float = 300) -> list[str]:
+    """Return the header row (row 1), cached for `ttl` seconds."""
+    return _header_entry(worksheet.title, ttl, worksheet.spreadsheet_id)[1]
+
+
+def get_column_map(worksheet: gspread.Worksheet, ttl: float = 300) -> dict[str, tuple[int, str]]:
+    """Return {header: (1-indexed column, A1 letter)}, built once alongside the cached header row."""
+    return _header_entry(worksheet.title, ttl, worksheet.spreadsheet_id)[2]
+
+
+def get_sheet_layout(sheet_name: str, ttl: float = 300) -> tuple[int, dict[str, tuple[int, str]]]:
+    """
+    Return (sheet id, column map) for a GOOGLE_SHEETS_ID sheet without
+    touching the API when the cache is warm — enough to address cells
+    in a spreadsheets.batchUpdate.
+    """
+    _, _, col_map, sheet_id = _header_entry(sheet_name, ttl)
+    return sheet_id, col_map
+
+
+def _last_values_db() -> sqlite3.Connection:
+    os.makedirs(HEADER_CACHE_DIR, exist_ok=True)
+    db = sqlite3.connect(LAST_VALUES_PATH, timeout=5)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute(
+        "CREATE TABLE IF NOT EXISTS last_values ("
+        "spreadsheet TEXT, sheet TEXT, row INTEGER, col TEXT, value TEXT, ts REAL, "
+        "PRIMARY KEY (spreadsheet, sheet, row, col))"
+    )
+    return db
+
+
+def drop_unchanged(sheet_name: str, updates_by_row: dict[int, dict]) -> dict[int, dict]:
+    """Return updates_by_row without the cells known to already hold that value (rows left empty are dropped)."""
+    spreadsheet_id = os.getenv("GOOGLE_SHEETS_ID")
+    try:
+        db = _last_values_db()
+        try:
+            known = {
+                (row, col): value
+                for row, col, value in db.execute(
+                    "SELECT row, col, value FROM last_values WHERE spreadsheet = ? AND sheet = ? AND ts > ?",
+                    (spreadsheet_id, sheet_name, time.time() - LAST_VALUES_TTL),
+                )
+            }
+        finally:
+            db.close()
+    except (sqlite3.Error, OSError) as e:
+        print(f"[sheets_client] Last-values cache unavailable: {e}", file=sys.stderr)
+        return updates_by_row
+
+    changed = {}
+    for row_num, updates in updates_by_row.items():
+        row_changes = {col: value for col, value in updates.items() if known.get((row_num, col)) != str(value)}
+        if row_changes:
+            changed[row_num] = row_changes
+    return changed
+
+
+def remember_values(sheet_name: str, values_by_row: dict[int, dict]) -> None:
+    """Record cell values just written to or read from the sheet."""
+    now = time.time()
+    spreadsheet_id = os.getenv("GOOGLE_SHEETS_ID")
+    rows = [
+        (spreadsheet_id, sheet_name, row_num, col, str(value), now)
+        for row_num, values in values_by_row.items()
+        for col, value in values.items()
+    ]
+    try:
+        db = _last_values_db()
+        try:
+            with db:
+                db.execute("DELETE FROM last_values WHERE ts <= ?", (now - LAST_VALUES_TTL,))
+                db.executemany("INSERT OR REPLACE INTO last_values VALUES (?, ?, ?, ?, ?, ?)", rows)
+        finally:
+            db.close()
+    except (sqlite3.Error, OSError) as e:
+        print(f"[sheets_client] Could not update last-values cache: {e}", file=sys.stderr)
+
+
+def cached_sheet_layout(sheet_name: str) -> tuple[int, dict[str, tuple[int, str]]] | None:
+    """(sheet id, column map) from the memory or disk cache, however old — never calls the API. None if not cached."""
+    spreadsheet_id = os.getenv("GOOGLE_SHEETS_ID")
+    cached = _HEADER_CACHE.get((spreadsheet_id, sheet_name))
+    if cached:
+        return cached[3], cached[2]
+    on_disk = _read_header_file(spreadsheet_id).get(sheet_name)
+    if on_disk and "columns" in on_disk and "sheet_id" in on_disk:
+        return on_disk["sheet_id"], {header: tuple(pos) for header, pos in on_disk["columns"].items()}
+    return None
+
+
+_bucket_unavailable = False
+
+
+def _take_write_token() -> None:
+    """
+    Block until the shared write bucket has a token, then consume it.
+    If the bucket file can't be used (owned by another user, read-only tmp),
+    writes go unthrottled — batch_update's 429 retries still back off.
+    """
+    global _bucket_unavailable
+    if _bucket_unavailable:
+        return
+    while True:
+        try:
+            granted, tokens = _try_take_write_token()
+        except OSError as e:
+            _bucket_unavailable = True
+            print(f"[sheets_client] Write rate limiter unavailable, not throttling: {e}", file=sys.stderr)
+            return
+        if granted:
+            return
+        time.sleep((1 - tokens) / WRITE_BUCKET_RATE)
+
+
+def _try_take_write_token() -> tuple[bool, float]:
+    """One locked read-modify-write of the bucket file. Returns (granted, tokens left)."""
+    with open(WRITE_BUCKET_PATH, "a+", encoding="utf-8") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)  # released when the file closes
+        f.seek(0)
+        try:
+            state = json.loads(f.read())
+        except ValueError:
+            state = {}
+        now = time.time()
+        refill = (now - state.get("ts", now)) * WRITE_BUCKET_RATE
+        tokens = min(WRITE_BUCKET_CAPACITY, state.get("tokens", WRITE_BUCKET_CAPACITY) + refill)
+        granted = tokens >= 1
+        if granted:
+            tokens -= 1
+        f.truncate(0)
+        f.write(json.dumps({"tokens": tokens, "ts": now}))
+    return granted, tokens
+
+
+def _retryable(exc: BaseException) -> bool:
+    """Rate limits (429), 5xx and dropped connections are retried; other 4xx are not."""
+    response = getattr(exc, "response", None)
+    if response is not None and hasattr(response, "status_code"):
+        return response.status_code == 429 or response.status_code >= 500
+    import requests
+    return isinstance(exc, requests.ConnectionError)
+
+
+def _log_retry(retry_state) -> None:
+    exc = retry_state.outcome.exception()
+    print(
+        f"[sheets_client] {type(exc).__name__}: {exc} — retrying in {retry_state.next_action.sleep:.1f}s "
+        f"(attempt {retry_state.attempt_number}/{WRITE_MAX_ATTEMPTS})",
+        file=sys.stderr,
+    )
+
+
+@retry(
+    retry=retry_if_exception(_retryable),
+    wait=wait_random_exponential(multiplier=0.5, max=30),
+    stop=stop_after_attempt(WRITE_MAX_ATTEMPTS),
+    before_sleep=_log_retry,
+    reraise=True,
+)
+def batch_update(body: dict) -> dict:
+    """POST a spreadsheets.batchUpdate for GOOGLE_SHEETS_ID directly (no open_by_key metadata fetch)."""
+    _take_write_token()
+    url = f"{SHEETS_API}/{os.getenv('GOOGLE_SHEETS_ID')}:batchUpdate"
+    return get_client().http_client.request("post", url, json=body).json()
+
+
+def invalidate_headers(sheet_name: str = None) -> None:
+    """Drop cached headers (memory and disk) for one sheet, or all sheets when sheet_name is None."""
+    spreadsheet_ids = {key[0] for key in _HEADER_CACHE}
+    if os.getenv("GOOGLE_SHEETS_ID"):
+        spreadsheet_ids.add(os.getenv("GOOGLE_SHEETS_ID"))
+
+    for key in list(_HEADER_CACHE):
+        if sheet_name is None or key[1] == sheet_name:
+            del _HEADER_CACHE[key]
+
+    for spreadsheet_id in spreadsheet_ids:
+        entries = _read_header_file(spreadsheet_id)
+        if sheet_name is None:
+            entries = {}
+        else:
+            entries.pop(sheet_name, None)
+        _write_header_file(spreadsheet_id, entries)
+
+
+def quote_sheet_name(sheet_name: str) -> str:
+    """Quote a sheet name for A1 notation ('Pipeline test'!B5); inner quotes are doubled."""
+    return "'" + sheet_name.replace("'", "''") + "'"
+
+
+@functools.lru_cache(maxsize=1024)
+def col_index_to_letter(idx: int) -> str:
+    """Convert 1-indexed column number to A1 letter notation (supports AA, AB, etc)."""
+    if idx <= 26:
+        return _ALPHA[idx - 1]
+    if idx <= 702:  # AA..ZZ
+        q, r = divmod(idx - 1, 26)
+        return _ALPHA[q - 1] + _ALPHA[r]
+    result = ""
+    while idx > 0:
+        idx, remainder = divmod(idx - 1, 26)
+        result = _ALPHA[remainder] + result
+    return result
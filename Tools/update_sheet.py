@@ -4,19 +4,38 @@ Update specific columns in a Pipeline sheet row.
 
 Usage:
     python Tools/update_sheet.py --sheet "Pipeline test" --row 5 --updates '{"Status":"DEPLOYING","Preview URL":"https://..."}'
+    python Tools/update_sheet.py --batch-file updates.jsonl
+    python Tools/update_sheet.py --sheet "Pipeline test" --row 5 --updates '{"Status":"GO"}' --dry-run
+    python Tools/update_sheet.py --daemon
 
 Finds each column by header name, updates only the specified cells.
+
+With a daemon running (--daemon), the CLI hands its update to the daemon over
+a Unix socket and exits right away; the daemon holds the authorized client and
+sheet handles, merges updates that arrive close together and writes them in
+one batchUpdate. Without a daemon the CLI writes directly, as before.
+
+--batch-file takes one JSON object per line, in the daemon's message format
+({"sheet": ..., "row": ..., "updates": {...}}; "sheet" may be left out when
+--sheet is given), and writes all of them with one batchUpdate per sheet.
+
+--dry-run prints the batchUpdate body (per sheet) instead of sending it: no
+auth, no API calls, no daemon. Columns come from the cached headers; for a
+sheet that was never cached every column is assumed to exist.
 """
 
 import sys
 import json
+import socket
 import argparse
+import tempfile
+import threading
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+# .env and sheets_client are loaded only once a write is actually needed
+# (see main / update_rows): handing an update to the daemon needs neither.
 sys.path.insert(0, os.path.dirname(__file__))
-import sheets_client
+import _env
 
 STATUS_COLORS = {
     "GO":                      {"red": 0.53, "green": 0.81, "blue": 0.98},  # light blue
@@ -31,57 +50,336 @@ STATUS_COLORS = {
     "ERROR":                   {"red": 0.96, "green": 0.37, "blue": 0.37},  # red
 }
 
+# userEnteredFormat for each status, built once; cells share these objects
+# (they are only ever serialized, never mutated)
+_STATUS_FORMATS = {status: {"backgroundColor": color} for status, color in STATUS_COLORS.items()}
+
+SOCKET_PATH = os.path.join(tempfile.gettempdir(), "update_sheet.sock")
+COALESCE_WINDOW = 0.25  # seconds the daemon waits to gather more updates
+QUEUE_MAX = 20          # ...or flush as soon as this many rows are queued
+REQUEUE_MAX = 3         # failed flushes of a row before its updates are dropped
+
+# (sheet, column) pairs we already refetched headers for in this process
+_REFETCHED_FOR: set[tuple[str, str]] = set()
+
 
 def update_row(sheet_name: str, row_num: int, updates: dict) -> None:
     """Update specific columns in a sheet row. updates = {column_header: value}."""
-    client = sheets_client.get_client()
-    spreadsheet = client.open_by_key(os.getenv("GOOGLE_SHEETS_ID"))
-    worksheet = spreadsheet.worksheet(sheet_name)
-
-    # Read headers (row 1)
-    headers = worksheet.row_values(1)
-
-    # Build batch update list
-    batch = []
-    for col_name, value in updates.items():
-        if col_name not in headers:
-            print(f"[update_sheet] WARNING: column '{col_name}' not found in headers, skipping", file=sys.stderr)
-            continue
-        col_idx = headers.index(col_name) + 1  # gspread is 1-indexed
-        col_letter = _col_index_to_letter(col_idx)
-        a1 = f"{col_letter}{row_num}"
-        batch.append({"range": a1, "values": [[str(value)]]})
-
-    if batch:
-        worksheet.batch_update(batch, value_input_option="RAW")
-        print(f"[update_sheet] Updated row {row_num}: {list(updates.keys())}", file=sys.stderr)
-
-    # Apply background color to Status cell when status changes
-    if "Status" in updates and updates["Status"] in STATUS_COLORS and "Status" in headers:
-        status_val = updates["Status"]
-        col_idx = headers.index("Status") + 1
-        col_letter = _col_index_to_letter(col_idx)
-        a1 = f"{col_letter}{row_num}"
-        worksheet.format(a1, {"backgroundColor": STATUS_COLORS[status_val]})
-
-
-def _col_index_to_letter(idx: int) -> str:
-    """Convert 1-indexed column number to A1 letter notation (supports AA, AB, etc)."""
-    result = ""
-    while idx > 0:
-        idx, remainder = divmod(idx - 1, 26)
-        result = chr(65 + remainder) + result
-    return result
+    update_rows(sheet_name, {row_num: updates})
+
+
+def update_rows(sheet_name: str, updates_by_row: dict[int, dict]) -> None:
+    """
+    Update many rows of one sheet in a single spreadsheets.batchUpdate:
+    one updateCells request per cell, with the Status background color
+    written in the same request as the Status value.
+    updates_by_row = {row_num: {column_header: value}}.
+    """
+    import sheets_client
+
+    # Cells that already hold the requested value (per the shared last-values
+    # cache) are dropped — a no-op write would still spend a quota token
+    updates_by_row = sheets_client.drop_unchanged(sheet_name, updates_by_row)
+    if not updates_by_row:
+        print(f"[update_sheet] Nothing changed in '{sheet_name}', skipping write", file=sys.stderr)
+        return
+
+    # Sheet id + header → (column index, letter), cached in memory and on disk
+    # (see sheets_client) — a warm write is a single HTTP call
+    sheet_id, col_map = sheets_client.get_sheet_layout(sheet_name)
+    missing = {(sheet_name, col) for updates in updates_by_row.values() for col in updates if col not in col_map}
+    if missing - _REFETCHED_FOR:
+        # Maybe the sheet gained a column since the headers were cached — refetch
+        # once per missing column, so a column that really isn't there costs nothing later
+        _REFETCHED_FOR.update(missing)
+        sheets_client.invalidate_headers(sheet_name)
+        sheet_id, col_map = sheets_client.get_sheet_layout(sheet_name)
+
+    requests, written = _build_requests(sheet_id, col_map, updates_by_row)
+    if requests:
+        sheets_client.batch_update({"requests": requests})
+        sheets_client.remember_values(sheet_name, written)
+        for row_num, updates in written.items():
+            print(f"[update_sheet] Updated row {row_num}: {list(updates.keys())}", file=sys.stderr)
+
+
+def _build_requests(sheet_id: int, col_map: dict[str, tuple[int, str]], updates_by_row: dict[int, dict]) -> tuple[list[dict], dict[int, dict]]:
+    """
+    updateCells requests for updates_by_row, plus the {row: {column: value}}
+    they write (columns missing from col_map are warned about and left out).
+    """
+    requests = []
+    written: dict[int, dict] = {}
+    for row_num, updates in updates_by_row.items():
+        cells = []  # (col_idx, cell, fields)
+        for col_name, value in updates.items():
+            entry = col_map.get(col_name)
+            if entry is None:
+                print(f"[update_sheet] WARNING: column '{col_name}' not found in headers, skipping", file=sys.stderr)
+                continue
+            written.setdefault(row_num, {})[col_name] = value
+            cell = {"userEnteredValue": _cell_value(value)}
+            fields = "userEnteredValue"
+            status_format = _STATUS_FORMATS.get(value) if col_name == "Status" else None
+            if status_format:
+                cell["userEnteredFormat"] = status_format
+                fields = "userEnteredValue,userEnteredFormat.backgroundColor"
+            cells.append((entry[0], cell, fields))
+        requests.extend(_update_runs(sheet_id, row_num, cells))
+    return requests, written
+
+
+def dry_run(sheet_name: str, updates_by_row: dict[int, dict]) -> dict:
+    """The batchUpdate body update_rows would send (before skipping unchanged cells), built offline."""
+    import sheets_client
+
+    layout = sheets_client.cached_sheet_layout(sheet_name)
+    if layout is None:
+        print(f"[update_sheet] No cached headers for '{sheet_name}', assuming every column exists", file=sys.stderr)
+        columns = dict.fromkeys(col for updates in updates_by_row.values() for col in updates)
+        layout = (0, {col: (idx, sheets_client.col_index_to_letter(idx)) for idx, col in enumerate(columns, 1)})
+    requests, _ = _build_requests(*layout, updates_by_row)
+    return {"requests": requests}
+
+
+def _cell_value(value) -> dict:
+    """Typed userEnteredValue, so numbers and booleans stay numbers and booleans in the sheet."""
+    if isinstance(value, bool):  # before int — bool is an int subclass
+        return {"boolValue": value}
+    if isinstance(value, (int, float)):
+        return {"numberValue": value}
+    # Strings go in verbatim, even ones starting with "=": drafts and error notes
+    # come from scraped/generated text and must never be evaluated as formulas
+    return {"stringValue": str(value)}
+
+
+def _update_runs(sheet_id: int, row_num: int, cells: list[tuple[int, dict, str]]) -> list[dict]:
+    """
+    One updateCells request per run of adjacent columns in a row.
+    A run also breaks where `fields` changes — a field mask applies to every
+    cell in the range, so a colored Status cell can't share one with plain cells.
+    """
+    requests = []
+    run: list[tuple[int, dict, str]] = []
+    for col_idx, cell, fields in sorted(cells, key=lambda c: c[0]):
+        if run and (col_idx != run[-1][0] + 1 or fields != run[-1][2]):
+            requests.append(_update_cells(sheet_id, row_num, run))
+            run = []
+        run.append((col_idx, cell, fields))
+    if run:
+        requests.append(_update_cells(sheet_id, row_num, run))
+    return requests
+
+
+def _update_cells(sheet_id: int, row_num: int, run: list[tuple[int, dict, str]]) -> dict:
+    """updateCells request for adjacent cells in one row (row_num / col_idx are 1-indexed)."""
+    return {
+        "updateCells": {
+            "range": {
+                "sheetId": sheet_id,
+                "startRowIndex": row_num - 1,
+                "endRowIndex": row_num,
+                "startColumnIndex": run[0][0] - 1,
+                "endColumnIndex": run[-1][0],
+            },
+            "rows": [{"values": [cell for _, cell, _ in run]}],
+            "fields": run[0][2],
+        }
+    }
+
+
+class RowUpdateBuffer:
+    """
+    Collects column updates for one row and writes them in one go on flush().
+
+    Each update_row() call is one batchUpdate (headers come from the cache),
+    but writing every intermediate status separately would still spend a
+    request and a write-quota token per status. stage() just merges into a
+    dict — later values for the same column win — and flush() writes
+    whatever is pending.
+    """
+
+    def __init__(self, sheet_name: str, row_num: int):
+        self.sheet_name = sheet_name
+        self.row_num = row_num
+        self._pending = {}
+
+    def stage(self, updates: dict) -> None:
+        self._pending.update(updates)
+
+    def take(self) -> dict:
+        """Hand the pending updates to the caller (for a multi-row write) and clear them."""
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def flush(self) -> None:
+        """
+        Write pending updates now; on failure they stay pending. Not safe to
+        overlap with stage() — for a background write, take() first and write
+        the taken updates instead.
+        """
+        if not self._pending:
+            return
+        update_row(self.sheet_name, self.row_num, self._pending)
+        self._pending = {}
+
+
+def _by_sheet(batch: dict[tuple[str, int], dict]) -> dict[str, dict[int, dict]]:
+    """{(sheet, row): updates} → {sheet: {row: updates}}, the shape update_rows takes."""
+    by_sheet: dict[str, dict[int, dict]] = {}
+    for (sheet_name, row_num), updates in batch.items():
+        by_sheet.setdefault(sheet_name, {})[row_num] = updates
+    return by_sheet
+
+
+def read_batch_file(path: str, default_sheet: str = None) -> dict[tuple[str, int], dict]:
+    """Read a JSONL batch file into {(sheet, row): updates}; later lines for the same row win per column."""
+    batch: dict[tuple[str, int], dict] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line_num, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                key = (entry.get("sheet") or default_sheet, int(entry["row"]))
+                updates = entry["updates"]
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                raise ValueError(f"{path}:{line_num}: bad entry ({e})") from e
+            if key[0] is None:
+                raise ValueError(f"{path}:{line_num}: no \"sheet\" and no --sheet given")
+            batch.setdefault(key, {}).update(updates)
+    return batch
+
+
+# ── DAEMON ────────────────────────────────────────────────────────────────
+
+def send_to_daemon(sheet_name: str, row_num: int, updates: dict) -> bool:
+    """Queue an update with a running daemon. Returns False if no daemon is listening."""
+    if not hasattr(socket, "AF_UNIX"):
+        return False
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(SOCKET_PATH)
+            message = {"sheet": sheet_name, "row": row_num, "updates": updates}
+            sock.sendall(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+        return True
+    except OSError:
+        return False
+
+
+def serve(socket_path: str = SOCKET_PATH) -> None:
+    """Accept line-delimited JSON updates and write them in coalesced batches."""
+    queue: dict[tuple[str, int], dict] = {}
+    failures: dict[tuple[str, int], int] = {}  # only touched by the flusher thread
+    lock = threading.Lock()
+    wake = threading.Event()
+
+    def handle(conn: socket.socket) -> None:
+        with conn, conn.makefile("r", encoding="utf-8") as lines:
+            for line in lines:
+                try:
+                    message = json.loads(line)
+                    key = (message["sheet"], int(message["row"]))
+                    updates = message["updates"]
+                except (ValueError, KeyError, TypeError) as e:
+                    print(f"[update_sheet] Ignoring bad message: {e}", file=sys.stderr)
+                    continue
+                with lock:
+                    queue.setdefault(key, {}).update(updates)
+                    if len(queue) >= QUEUE_MAX:
+                        wake.set()
+
+    def flusher() -> None:
+        while True:
+            wake.wait(COALESCE_WINDOW)
+            wake.clear()
+            with lock:
+                if not queue:
+                    continue
+                batch = dict(queue)
+                queue.clear()
+            for sheet_name, rows in _by_sheet(batch).items():
+                try:
+                    update_rows(sheet_name, rows)
+                except Exception as e:
+                    # The CLI already reported "Queued" — put the rows back
+                    # (under anything newer that arrived meanwhile) rather
+                    # than losing them, unless they keep failing
+                    print(f"[update_sheet] Write failed for '{sheet_name}' rows {sorted(rows)}: {e}", file=sys.stderr)
+                    with lock:
+                        for row_num, updates in rows.items():
+                            key = (sheet_name, row_num)
+                            failures[key] = failures.get(key, 0) + 1
+                            if failures[key] >= REQUEUE_MAX:
+                                del failures[key]
+                                print(f"[update_sheet] Dropping row {row_num} after {REQUEUE_MAX} failed writes: {updates}", file=sys.stderr)
+                                continue
+                            queue[key] = {**updates, **queue.get(key, {})}
+                else:
+                    for row_num in rows:
+                        failures.pop((sheet_name, row_num), None)
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)  # stale socket from a previous daemon
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen()
+    threading.Thread(target=flusher, daemon=True).start()
+    print(f"[update_sheet] Daemon listening on {socket_path}", file=sys.stderr)
+
+    try:
+        while True:
+            conn, _ = server.accept()
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+    finally:
+        server.close()
+        os.unlink(socket_path)
 
 
 def main():
     parser = argparse.ArgumentParser(description="Update columns in a Pipeline sheet row")
-    parser.add_argument("--sheet", required=True, help="Sheet name")
-    parser.add_argument("--row", type=int, required=True, help="1-indexed row number")
-    parser.add_argument("--updates", required=True, help='JSON dict of {column: value}')
+    parser.add_argument("--daemon", action="store_true", help=f"Run the coalescing updater on {SOCKET_PATH}")
+    parser.add_argument("--sheet", help="Sheet name")
+    parser.add_argument("--row", type=int, help="1-indexed row number")
+    parser.add_argument("--updates", help='JSON dict of {column: value}')
+    parser.add_argument("--batch-file", help="JSONL file of {sheet, row, updates} to write in one go")
+    parser.add_argument("--dry-run", action="store_true", help="Print the batchUpdate body instead of sending it")
     args = parser.parse_args()
 
-    updates = json.loads(args.updates)
+    if args.daemon:
+        if not hasattr(socket, "AF_UNIX"):
+            parser.error("--daemon needs Unix domain sockets (not available on this platform)")
+        _env.load()
+        serve()
+        return
+
+    if args.batch_file:
+        try:
+            batch = read_batch_file(args.batch_file, default_sheet=args.sheet)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+    elif args.sheet and args.row and args.updates:
+        batch = {(args.sheet, args.row): json.loads(args.updates)}
+    else:
+        parser.error("--sheet, --row and --updates are required (unless --daemon or --batch-file)")
+
+    if args.dry_run:
+        _env.load()  # GOOGLE_SHEETS_ID names the header cache file
+        bodies = {sheet_name: dry_run(sheet_name, rows) for sheet_name, rows in _by_sheet(batch).items()}
+        print(json.dumps(bodies, ensure_ascii=False, indent=2))
+        return
+
+    if args.batch_file:
+        _env.load()
+        for sheet_name, rows in _by_sheet(batch).items():
+            update_rows(sheet_name, rows)
+        return
+
+    updates = batch[(args.sheet, args.row)]
+    if send_to_daemon(args.sheet, args.row, updates):
+        print(f"[update_sheet] Queued row {args.row} with daemon: {list(updates.keys())}", file=sys.stderr)
+        return
+    _env.load()
     update_row(args.sheet, args.row, updates)
 
 
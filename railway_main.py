@@ -8,17 +8,22 @@ import time
 
 
 def ensure_google_token():
-    """Decode GOOGLE_TOKEN_PICKLE_B64 env var → token.pickle on disk."""
-    token_b64 = os.getenv("GOOGLE_TOKEN_PICKLE_B64")
-    token_path = os.path.join(os.path.dirname(__file__), "token.pickle")
-
-    if token_b64:
-        token_bytes = base64.b64decode(token_b64)
-        with open(token_path, "wb") as f:
-            f.write(token_bytes)
-        print(f"[railway] Wrote token.pickle ({len(token_bytes)} bytes)")
-    elif not os.path.exists(token_path):
-        print("[railway] ERROR: No GOOGLE_TOKEN_PICKLE_B64 env var and no token.pickle file")
+    """Decode GOOGLE_TOKEN_JSON_B64 → token.json (or legacy GOOGLE_TOKEN_PICKLE_B64 → token.pickle)."""
+    root = os.path.dirname(__file__)
+    for env_var, filename in (
+        ("GOOGLE_TOKEN_JSON_B64", "token.json"),
+        ("GOOGLE_TOKEN_PICKLE_B64", "token.pickle"),
+    ):
+        token_b64 = os.getenv(env_var)
+        if token_b64:
+            token_bytes = base64.b64decode(token_b64)
+            with open(os.path.join(root, filename), "wb") as f:
+                f.write(token_bytes)
+            print(f"[railway] Wrote {filename} ({len(token_bytes)} bytes)")
+            return
+
+    if not any(os.path.exists(os.path.join(root, name)) for name in ("token.json", "token.pickle")):
+        print("[railway] ERROR: No GOOGLE_TOKEN_JSON_B64 env var and no token.json file")
         sys.exit(1)
 
 